@@ -0,0 +1,143 @@
+# Seeded synthetic ledgers for the benchmarks: entries, their edit histories and goals,
+# written straight into the schema that db_utils.create_table() sets up
+import os
+import random
+import sys
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'networthcalculator'))
+
+from db_utils import (
+    use_database, get_db_connection, create_table, transaction, rebuild_daily_totals, insert_entry_rows, deferred_search_index,
+    ASSET_CATEGORIES, LIABILITY_CATEGORIES, CASHFLOW_CATEGORIES
+)
+from aggregates import ASSETS, LIABILITIES, CASH_FLOW
+
+# Ledger sizes the benchmarks run at, by name
+SIZES = {
+    "1k": 1_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+DEFAULT_SEED = 42
+# Bump when the generator changes so ledgers cached by an older version are rebuilt
+GENERATOR_VERSION = 2
+# Generated databases are kept here and reused while the seed and size stay the same
+DATA_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.data')
+# Entries written per transaction
+WRITE_CHUNK_SIZE = 20000
+
+# Share of entries per category, with (subcategories, typical value) for each
+CATEGORY_MIX = [
+    (ASSETS, 0.5, ASSET_CATEGORIES, 25000),
+    (LIABILITIES, 0.2, LIABILITY_CATEGORIES, 15000),
+    (CASH_FLOW, 0.3, CASHFLOW_CATEGORIES, 2500),
+]
+# The ledger spans this many days back from FIRST_DAY + HISTORY_DAYS
+FIRST_DAY = date(2015, 1, 1)
+HISTORY_DAYS = 10 * 365
+# Chance that an entry is edited again after each edit, giving a geometric number of edits
+EDIT_PROBABILITY = 0.35
+MAX_EDITS = 12
+GOAL_COUNT = 300
+
+def database_path(size, seed=DEFAULT_SEED):
+    return os.path.join(DATA_FOLDER, f"ledger_{size}_seed{seed}_v{GENERATOR_VERSION}.db")
+
+def _entry(rng, entry_id):
+    # One entry plus its history: the opening row followed by edits on later days
+    roll = rng.random()
+    for category, share, subcategories, typical in CATEGORY_MIX:
+        roll -= share
+        if roll < 0:
+            break
+    subcategory = rng.choice(subcategories)
+    day = FIRST_DAY + timedelta(days=rng.randrange(HISTORY_DAYS))
+    value = round(rng.lognormvariate(0, 1) * typical, 2)
+    description = f"{subcategory} #{entry_id}"
+
+    history = [(entry_id, day.isoformat(), 0, value, value, description)]
+    edits = 0
+    while edits < MAX_EDITS and rng.random() < EDIT_PROBABILITY:
+        edits += 1
+        # Edits land weeks to months later and move the value by a few percent
+        day = min(day + timedelta(days=rng.randint(7, 120)), FIRST_DAY + timedelta(days=HISTORY_DAYS))
+        old_value, value = value, round(max(value * rng.gauss(1.02, 0.08), 0), 2)
+        history.append((entry_id, day.isoformat(), old_value, value, value - old_value, description))
+    return (entry_id, day.isoformat(), category, subcategory, description, value), history
+
+def _goals(rng):
+    goals = []
+    for _ in range(GOAL_COUNT):
+        goal_type, subcategories = rng.choice([
+            ("Asset", ASSET_CATEGORIES),
+            ("Liability", LIABILITY_CATEGORIES),
+            ("Cash Flow", CASHFLOW_CATEGORIES),
+            ("Net Worth", ["Net Worth"]),
+        ])
+        goals.append((goal_type, rng.choice(subcategories), round(rng.uniform(10_000, 5_000_000), 2), 0))
+    return goals
+
+def generate_ledger(path, entries, seed=DEFAULT_SEED, progress=None):
+    # Build a fresh database at path; progress(written) is called after each chunk
+    if os.path.exists(path):
+        os.remove(path)
+    use_database(path)
+    create_table()
+    rng = random.Random(seed)
+
+    written = 0
+    while written < entries:
+        rows = []
+        history = []
+        for entry_id in range(written + 1, min(written + WRITE_CHUNK_SIZE, entries) + 1):
+            row, entry_history = _entry(rng, entry_id)
+            rows.append(row)
+            history.extend(entry_history)
+        with transaction() as cursor, deferred_search_index(cursor, rows[0][0], rows[-1][0]):
+            insert_entry_rows(cursor, rows)
+            cursor.executemany(
+                "INSERT INTO assets_liabilities_history (asset_liability_id, date, old_value, new_value, difference, description) VALUES (?, ?, ?, ?, ?, ?)",
+                history
+            )
+        written += len(rows)
+        if progress:
+            progress(written)
+
+    with transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO goals (goal_type, goal_subcategory, goal_amount, progress) VALUES (?, ?, ?, ?)",
+            _goals(rng)
+        )
+        # Running totals in one pass rather than one update per generated row
+        rebuild_daily_totals(cursor)
+    return path
+
+def ensure_ledger(size, seed=DEFAULT_SEED, regenerate=False, progress=None):
+    # Path to the generated ledger for a size name, building it on first use
+    path = database_path(size, seed)
+    if regenerate or not os.path.exists(path):
+        os.makedirs(DATA_FOLDER, exist_ok=True)
+        # Build under a temporary name so an interrupted run never leaves a half-written ledger behind
+        generate_ledger(path + ".tmp", SIZES[size], seed, progress)
+        # Fold the write-ahead log back into the file so it can be renamed on its own
+        get_db_connection().execute("PRAGMA journal_mode=DELETE")
+        os.replace(path + ".tmp", path)
+    use_database(path)
+    # Ledgers generated before a schema migration are brought up to date like any app database
+    create_table()
+    return path
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a seeded synthetic net worth ledger")
+    parser.add_argument("--size", choices=SIZES, default="1k", help="number of entries")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help=f"database file to write (default: {DATA_FOLDER}/ledger_<size>_seed<seed>_v<version>.db)")
+    args = parser.parse_args()
+
+    path = args.output or database_path(args.size, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    generate_ledger(path, SIZES[args.size], args.seed, progress=lambda written: print(f"  {written} entries", end="\r"))
+    print(f"Wrote {SIZES[args.size]} entries to {path}")
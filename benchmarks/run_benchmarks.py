@@ -0,0 +1,243 @@
+# Times the data paths behind the dashboard, analytics, View/Edit and export pages against
+# generated ledgers and writes the results as JSON so runs can be compared
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Importing generate_ledger also puts src/networthcalculator on sys.path
+from generate_ledger import ensure_ledger, SIZES, DEFAULT_SEED
+
+import engine
+import asof
+import ledger
+import trends
+import projection
+from db_utils import get_db_connection
+from exporter import export_tables
+from aggregates import ASSETS, LIABILITIES, CASH_FLOW, CATEGORIES
+
+APP_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'networthcalculator')
+RESULTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+DEFAULT_REPEATS = 5
+# Medians that grow by more than this fraction count as regressions in --compare
+REGRESSION_THRESHOLD = 0.10
+
+class ImportCase:
+    # Cold import of app modules in a fresh interpreter; only the imports are timed, not interpreter start-up
+    def __init__(self, *modules):
+        self.modules = modules
+
+    def __call__(self):
+        code = (
+            "import time\n"
+            "start = time.perf_counter()\n"
+            f"import {', '.join(self.modules)}\n"
+            "print(time.perf_counter() - start)\n"
+        )
+        output = subprocess.run([sys.executable, "-c", code], cwd=APP_FOLDER, capture_output=True, text=True, check=True)
+        return float(output.stdout.split()[-1])
+
+def _last_page(conn, category, page_size=25):
+    return max(1, -(-engine.count_entries(conn, category) // page_size))
+
+def _export(names, file_format):
+    result = export_tables(names, file_format)
+    result.buffer.close()
+    return result.rows
+
+def dashboard_cases(conn):
+    index = asof.build_index(conn)
+    deltas = trends.load_deltas(conn)
+    goal = engine.goals_for_summary(conn, ledger.shared(conn).summary())[0]
+    return {
+        "dashboard.ledger_totals": lambda: engine.ledger_totals(conn),
+        # As the dashboard loads them: measured against the summary of the shared in-memory ledger
+        "dashboard.goals": lambda: engine.goals_for_summary(conn, ledger.shared(conn).summary()),
+        "dashboard.net_worth_series": lambda: engine.net_worth_series(conn),
+        "dashboard.cumulative_index": lambda: asof.build_index(conn),
+        "dashboard.as_of_snapshot": lambda: index.snapshot("2020-06-30"),
+        "dashboard.as_of_goals": lambda: asof.goals_as_of(conn, index, "2020-06-30"),
+        "dashboard.compare_dates": lambda: index.compare("2019-12-31", "2020-12-31"),
+        # 10k paths over 30 years; the standard normals are drawn on the first run only
+        "dashboard.goal_projection": lambda: projection.project_goal(deltas, goal),
+    }
+
+def analytics_cases(conn):
+    deltas = trends.load_deltas(conn)
+    return {
+        "analytics.ledger_totals": lambda: engine.ledger_totals(conn),
+        "analytics.monthly_trends": lambda: engine.period_trends(conn, '%Y-%m'),
+        "analytics.yearly_trends": lambda: engine.period_trends(conn, '%Y'),
+        "analytics.subcategory_trends": lambda: engine.subcategory_trends(conn),
+        "analytics.balance_deltas": lambda: trends.load_deltas(conn),
+        "analytics.balance_trends_day": lambda: deltas.balances(trends.DAY),
+        "analytics.balance_trends_week": lambda: deltas.balances(trends.WEEK),
+        "analytics.balance_trends_month": lambda: deltas.balances(trends.MONTH),
+        "analytics.top_n": lambda: engine.top_n(conn, 5),
+        "analytics.recent_entries": lambda: engine.recent_entries(conn),
+    }
+
+def view_edit_cases(conn):
+    last_page = _last_page(conn, ASSETS)
+    stocks = engine.EntrySearch("stocks")
+    return {
+        "view_edit.count_entries": lambda: [engine.count_entries(conn, category) for category in CATEGORIES],
+        "view_edit.first_page": lambda: engine.entries_page(conn, ASSETS),
+        "view_edit.last_page": lambda: engine.entries_page(conn, ASSETS, page=last_page),
+        "view_edit.sorted_by_value": lambda: engine.entries_page(conn, LIABILITIES, sort_column="value", descending=False),
+        "view_edit.subcategory_filter": lambda: engine.entries_page(conn, CASH_FLOW, "Salary"),
+        # Generated descriptions are "<subcategory> #<id>": one common word and one near-unique one
+        "view_edit.search_common": lambda: engine.entries_page(conn, ASSETS, search=stocks),
+        "view_edit.search_rare": lambda: engine.entries_page(conn, ASSETS, search=engine.EntrySearch("4242", include_history=True)),
+        "view_edit.search_count": lambda: engine.count_entries(conn, ASSETS, search=stocks),
+        "view_edit.value_range": lambda: engine.entries_page(conn, LIABILITIES, search=engine.EntrySearch(min_value=1000, max_value=2000)),
+    }
+
+def export_cases(conn):
+    # Excel sheets stop at 1,048,576 rows, so only the entries table goes through xlsx
+    return {
+        "export.entries_csv": lambda: _export(["entries"], "csv"),
+        "export.entries_jsonl": lambda: _export(["entries"], "jsonl"),
+        "export.entries_parquet": lambda: _export(["entries"], "parquet"),
+        "export.entries_xlsx": lambda: _export(["entries"], "xlsx"),
+        "export.all_tables_csv_zip": lambda: _export(["entries", "history", "goals"], "csv"),
+    }
+
+def ledger_cases(conn):
+    # The in-memory ledger the pages aggregate from: a full load, a refresh with nothing to do,
+    # and each aggregate computed from the arrays
+    loaded = ledger.load(conn)
+    return {
+        "ledger.load": lambda: ledger.load(conn),
+        "ledger.refresh_unchanged": lambda: ledger.refresh(loaded, conn),
+        "ledger.summary": loaded.summary,
+        "ledger.monthly_trends": lambda: loaded.period_trends('%Y-%m'),
+        "ledger.yearly_trends": lambda: loaded.period_trends('%Y'),
+        "ledger.subcategory_trends": loaded.subcategory_trends,
+        "ledger.top_n": lambda: loaded.top_subcategories(5),
+        "ledger.count_entries": lambda: [loaded.count(category) for category in CATEGORIES],
+    }
+
+def startup_cases(conn):
+    # What a cold start costs before the first page can paint, for the app shell and each page module
+    return {
+        "startup.import_app": ImportCase("app"),
+        "startup.import_entry_forms": ImportCase("app", "views.entry_forms"),
+        "startup.import_dashboard": ImportCase("app", "views.dashboard"),
+        "startup.import_analytics": ImportCase("app", "views.analytics"),
+        "startup.import_view_edit": ImportCase("app", "views.view_edit"),
+    }
+
+PAGES = {
+    "startup": startup_cases,
+    "dashboard": dashboard_cases,
+    "analytics": analytics_cases,
+    "view_edit": view_edit_cases,
+    "export": export_cases,
+    "ledger": ledger_cases,
+}
+
+def time_case(func, repeats):
+    # One untimed warm-up call so every timed run sees the same page cache state
+    func()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        # Import cases report their own time, measured inside the child interpreter
+        timings.append(result if isinstance(func, ImportCase) else time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+        "repeats": repeats,
+    }
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(sizes, pages, repeats, seed, only=None):
+    results = {}
+    for size in sizes:
+        print(f"[{size}] preparing ledger", file=sys.stderr)
+        ensure_ledger(size, seed, progress=lambda written: print(f"\r  {written} entries", end="", file=sys.stderr))
+        print(f"\r[{size}] {SIZES[size]} entries ready", file=sys.stderr)
+        conn = get_db_connection()
+        size_results = results[size] = {}
+        for page in pages:
+            for name, func in PAGES[page](conn).items():
+                if only and only not in name:
+                    continue
+                size_results[name] = timing = time_case(func, repeats)
+                print(f"[{size}] {name:<32} median {timing['median'] * 1000:10.2f} ms", file=sys.stderr)
+    return {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeats": repeats,
+            "sizes": {size: SIZES[size] for size in sizes},
+        },
+        "results": results,
+    }
+
+def compare(old_path, new_path, threshold=REGRESSION_THRESHOLD):
+    # Print median timings side by side and return the cases that got slower than the threshold
+    with open(old_path) as old_file, open(new_path) as new_file:
+        old, new = json.load(old_file)["results"], json.load(new_file)["results"]
+    regressions = []
+    print(f"{'case':<44} {'old ms':>10} {'new ms':>10} {'change':>8}")
+    for size, cases in new.items():
+        for name, timing in cases.items():
+            before = old.get(size, {}).get(name)
+            if before is None:
+                continue
+            change = timing["median"] / before["median"] - 1 if before["median"] else 0.0
+            flag = ""
+            if change > threshold:
+                regressions.append((size, name, change))
+                flag = "  slower"
+            print(f"{size + ' ' + name:<44} {before['median'] * 1000:10.2f} {timing['median'] * 1000:10.2f} {change:+8.1%}{flag}")
+    return regressions
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the net worth calculator's data paths")
+    parser.add_argument("--sizes", nargs="+", choices=SIZES, default=["1k", "100k"], help="ledger sizes to run at")
+    parser.add_argument("--pages", nargs="+", choices=PAGES, default=list(PAGES), help="pages whose data paths are timed")
+    parser.add_argument("--only", help="only run cases whose name contains this text")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="results file (default: results/<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two results files instead of running")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, threshold=args.threshold)
+        print(f"{len(regressions)} regression(s) above {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
+
+    report = run(args.sizes, args.pages, args.repeats, args.seed, args.only)
+    output = args.output or os.path.join(RESULTS_FOLDER, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(report, results_file, indent=2)
+    print(f"Results written to {output}")
@@ -0,0 +1,136 @@
+# Simulates several sessions saving at once, writing either straight to SQLite (every session
+# takes the write lock in turn) or through the single writer queue, while readers keep querying
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+
+from generate_ledger import ensure_ledger, DEFAULT_SEED
+from run_benchmarks import RESULTS_FOLDER, git_commit
+
+import engine
+from db_utils import use_database, get_db_connection, insert_entry
+from writer import WriteQueue
+
+MODES = ("direct", "queue")
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_mode(mode, path, sessions, writes, readers):
+    # One round: `sessions` threads each save `writes` entries while `readers` threads read totals
+    use_database(path)
+    queue = WriteQueue() if mode == "queue" else None
+    latencies = []
+    errors = []
+    reads = [0]
+    done = threading.Event()
+    lock = threading.Lock()
+
+    def session(number):
+        for write_number in range(writes):
+            args = ("2024-01-01", "assets", "Stocks", f"session {number} write {write_number}", 100.0)
+            start = time.perf_counter()
+            try:
+                if queue is None:
+                    insert_entry(*args)
+                else:
+                    queue.write(insert_entry, *args)
+            except Exception as error:
+                with lock:
+                    errors.append(repr(error))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    def reader():
+        conn = get_db_connection()
+        while not done.is_set():
+            engine.ledger_totals(conn)
+            with lock:
+                reads[0] += 1
+
+    reader_threads = [threading.Thread(target=reader) for _ in range(readers)]
+    session_threads = [threading.Thread(target=session, args=(number,)) for number in range(sessions)]
+    for thread in reader_threads:
+        thread.start()
+    start = time.perf_counter()
+    for thread in session_threads:
+        thread.start()
+    for thread in session_threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    for thread in reader_threads:
+        thread.join()
+
+    result = {
+        "writes": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "writes_per_second": len(latencies) / elapsed,
+        "reads_per_second": reads[0] / elapsed,
+        "latency_median": statistics.median(latencies) if latencies else None,
+        "latency_p95": _percentile(latencies, 0.95) if latencies else None,
+        "latency_max": max(latencies) if latencies else None,
+    }
+    if queue is not None:
+        result["transactions"] = queue.batches
+        result["average_batch"] = queue.jobs / queue.batches if queue.batches else 0
+    return result
+
+def run(sessions, writes, readers, size, seed):
+    source = ensure_ledger(size, seed)
+    # Fold anything ensure_ledger committed (such as a schema migration) into the file before copying it
+    get_db_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        for mode in MODES:
+            # Every mode starts from a fresh copy of the same ledger
+            path = os.path.join(folder, f"{mode}.db")
+            shutil.copy(source, path)
+            results[mode] = run_mode(mode, path, sessions, writes, readers)
+            print(
+                f"{mode:<7} {results[mode]['writes_per_second']:8.1f} writes/s  "
+                f"p95 {results[mode]['latency_p95'] * 1000:8.1f} ms  "
+                f"{results[mode]['reads_per_second']:8.1f} reads/s  {results[mode]['errors']} errors",
+                file=sys.stderr
+            )
+        use_database(source)
+    return {
+        "metadata": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": git_commit(),
+            "sessions": sessions,
+            "writes_per_session": writes,
+            "readers": readers,
+            "ledger": size,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Stress concurrent writes with and without the writer queue")
+    parser.add_argument("--sessions", type=int, default=16, help="simulated sessions saving at once")
+    parser.add_argument("--writes", type=int, default=50, help="saves per session")
+    parser.add_argument("--readers", type=int, default=4, help="threads reading totals meanwhile")
+    parser.add_argument("--size", default="1k", help="generated ledger to start from")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--output", help="results file (default: results/stress-<timestamp>.json)")
+    args = parser.parse_args()
+
+    report = run(args.sessions, args.writes, args.readers, args.size, args.seed)
+    output = args.output or os.path.join(RESULTS_FOLDER, "stress-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(report, results_file, indent=2)
+    print(f"Results written to {output}")
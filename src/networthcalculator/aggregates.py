@@ -0,0 +1,114 @@
+from dataclasses import dataclass, field
+
+# Category names as stored in the categories table (and shown in assets_liabilities.category)
+ASSETS = "assets"
+LIABILITIES = "liabilities"
+CASH_FLOW = "cash flow"
+CATEGORIES = [ASSETS, LIABILITIES, CASH_FLOW]
+
+@dataclass
+class Stats:
+    count: int = 0
+    total: float = 0.0
+    minimum: float | None = None
+    maximum: float | None = None
+
+    @property
+    def average(self):
+        return self.total / self.count if self.count else 0.0
+
+    def merge(self, other):
+        # Fold another group's figures into this one
+        self.count += other.count
+        self.total += other.total
+        if other.minimum is not None:
+            self.minimum = other.minimum if self.minimum is None else min(self.minimum, other.minimum)
+        if other.maximum is not None:
+            self.maximum = other.maximum if self.maximum is None else max(self.maximum, other.maximum)
+
+@dataclass
+class LedgerSummary:
+    categories: dict = field(default_factory=dict)
+    subcategories: dict = field(default_factory=dict)
+
+    def category(self, category):
+        return self.categories.get(category, Stats())
+
+    def subcategory(self, category, subcategory):
+        return self.subcategories.get((category, subcategory), Stats())
+
+    def subcategory_totals(self, category):
+        # Subcategory name -> total value, for the distribution charts
+        return {
+            subcategory: stats.total
+            for (cat, subcategory), stats in self.subcategories.items()
+            if cat == category
+        }
+
+    @property
+    def total_assets(self):
+        return self.category(ASSETS).total
+
+    @property
+    def total_liabilities(self):
+        return self.category(LIABILITIES).total
+
+    @property
+    def total_cash_flow(self):
+        return self.category(CASH_FLOW).total
+
+    @property
+    def net_worth(self):
+        return self.total_assets - self.total_liabilities
+
+    @property
+    def debt_to_asset_ratio(self):
+        return self.total_liabilities / self.total_assets if self.total_assets > 0 else 0.0
+
+def load_summary(conn):
+    # One grouped pass over the ledger gives every count, sum, min and max the pages need
+    summary = LedgerSummary()
+    # Grouped on the integer keys and in whole cents; names are looked up once per group
+    rows = conn.execute('''
+        SELECT c.name, s.name, g.count, g.total, g.minimum, g.maximum
+        FROM (
+            SELECT category_id, subcategory_id, COUNT(*) AS count, SUM(value_cents) AS total,
+                   MIN(value_cents) AS minimum, MAX(value_cents) AS maximum
+            FROM entries
+            GROUP BY category_id, subcategory_id
+        ) g
+        JOIN categories c ON c.id = g.category_id
+        JOIN subcategories s ON s.id = g.subcategory_id
+    ''')
+    for category, subcategory, count, total, minimum, maximum in rows:
+        stats = Stats(count, (total or 0) / 100, minimum / 100, maximum / 100)
+        summary.subcategories[(category, subcategory)] = stats
+        summary.categories.setdefault(category, Stats()).merge(stats)
+    return summary
+
+@dataclass
+class TopSubcategory:
+    subcategory: str
+    total: float
+    count: int
+    rank: int
+
+def top_subcategories(conn, limit=5):
+    # Largest subcategories of every category with their entry counts, ranked in one windowed query
+    rows = conn.execute('''
+        SELECT c.name, s.name, ranked.total_cents, ranked.num_entries, ranked.position
+        FROM (
+            SELECT category_id, subcategory_id, SUM(value_cents) AS total_cents, COUNT(*) AS num_entries,
+                   ROW_NUMBER() OVER (PARTITION BY category_id ORDER BY SUM(value_cents) DESC) AS position
+            FROM entries
+            GROUP BY category_id, subcategory_id
+        ) ranked
+        JOIN categories c ON c.id = ranked.category_id
+        JOIN subcategories s ON s.id = ranked.subcategory_id
+        WHERE ranked.position <= ?
+        ORDER BY c.name, ranked.position
+    ''', (limit,))
+    top = {category: [] for category in CATEGORIES}
+    for category, subcategory, total_cents, count, position in rows:
+        top.setdefault(category, []).append(TopSubcategory(subcategory, (total_cents or 0) / 100, count, position))
+    return top
@@ -0,0 +1,208 @@
+# History compaction: every save appends a row to assets_liabilities_history, so the table, and
+# with it the daily totals the dashboard reads, would grow with every edit ever made. Changes older
+# than a horizon are folded into one checkpoint row per entry and month, dated on the month's last
+# day, and the raw rows move to an archive database next to the main one (attached as "archive")
+# where they can still be looked up. Balances and net worth at the end of every compacted month,
+# and on every day after the horizon, stay exactly as they were
+import os
+from dataclasses import dataclass
+from datetime import date
+
+from db_utils import get_db_connection, transaction, record_daily_changes
+from writer import submit_alone
+
+# Months of raw history kept in the main database; set NETWORTH_HISTORY_MONTHS to change it
+HISTORY_HORIZON_MONTHS = int(os.environ.get("NETWORTH_HISTORY_MONTHS", "24"))
+ARCHIVE_SCHEMA = "archive"
+CHECKPOINT_DESCRIPTION = "Monthly checkpoint"
+# Running totals this close to zero after folding are float noise of changes that cancelled out
+ZERO_DELTA = 1e-9
+
+# History rows old enough to fold, given the first day kept in full
+_FOLDABLE = "h.date < ? AND date(h.date) IS NOT NULL"
+
+@dataclass
+class CompactionResult:
+    archived: int  # raw rows copied to the archive
+    folded: int  # rows of the main history replaced by checkpoints
+    checkpoints: int  # checkpoint rows written
+
+def archive_path(conn):
+    # networth.db -> networth-archive.db, next to whichever database the connection is on
+    main_path = conn.execute("PRAGMA database_list").fetchone()[2]
+    return os.path.splitext(main_path)[0] + "-archive.db"
+
+def attach(conn, path=None):
+    # Attach the archive to a connection, creating it on first use. SQLite cannot attach inside a
+    # transaction, so call this before transaction()
+    if ARCHIVE_SCHEMA not in {row[1] for row in conn.execute("PRAGMA database_list")}:
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path or archive_path(conn),))
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.assets_liabilities_history (
+            id INTEGER PRIMARY KEY,
+            asset_liability_id INTEGER,
+            date TEXT,
+            old_value REAL,
+            new_value REAL,
+            difference REAL,
+            description TEXT NOT NULL
+        )
+    ''')
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_history_entry_date ON assets_liabilities_history (asset_liability_id, date)")
+
+def horizon_start(months=HISTORY_HORIZON_MONTHS, today=None):
+    # First day of the month `months` months before this one; history from then on is kept raw
+    today = today or date.today()
+    month = today.year * 12 + today.month - 1 - months
+    return date(month // 12, month % 12 + 1, 1).isoformat()
+
+def compact_history(before, path=None):
+    # Fold the history dated before `before` (moved back to the first of its month, so checkpoints
+    # never land after it) into monthly checkpoints. Runs in two transactions, because SQLite
+    # commits WAL databases one file at a time: the raw rows are copied to the archive first, and
+    # only rows the archive already holds are folded, so an interrupted run loses nothing and can
+    # simply be run again.
+    # It runs on the writer thread like every other write, but on its own: it needs ATTACH, which
+    # SQLite refuses inside the writer's batch transaction, and commits twice. Saves queued
+    # meanwhile wait for it instead of failing on a locked database
+    before = date.fromisoformat(str(before)).replace(day=1).isoformat()
+    return submit_alone(_compact_history, before, path).result()
+
+def _compact_history(before, path):
+    conn = get_db_connection()
+    attach(conn, path)
+    try:
+        return _fold_history(before)
+    finally:
+        # The writer's connection goes back to serving batches without the archive attached
+        conn.execute(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+
+def _fold_history(before):
+    with transaction() as cursor:
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO {ARCHIVE_SCHEMA}.assets_liabilities_history (id, asset_liability_id, date, old_value, new_value, difference, description)
+            SELECT id, asset_liability_id, date, old_value, new_value, difference, description
+            FROM main.assets_liabilities_history h
+            WHERE checkpoint = 0 AND {_FOLDABLE}
+        ''', (before,))
+        archived = cursor.rowcount
+        # Archived changes of entries deleted since the last run go as well
+        cursor.execute(f'''
+            DELETE FROM {ARCHIVE_SCHEMA}.assets_liabilities_history
+            WHERE asset_liability_id NOT IN (SELECT id FROM main.entries)
+        ''')
+
+    with transaction() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS temp.folded")
+        # Archived raw rows, plus earlier checkpoints of months that have since gained new rows
+        cursor.execute('''
+            CREATE TEMP TABLE folded (
+                id INTEGER PRIMARY KEY, entry_id INTEGER, date TEXT, old_value REAL, new_value REAL,
+                difference REAL, checkpoint INTEGER, checkpoint_date TEXT
+            )
+        ''')
+        cursor.execute(f'''
+            INSERT INTO temp.folded
+            SELECT h.id, h.asset_liability_id AS entry_id, h.date, h.old_value, h.new_value, h.difference, h.checkpoint,
+                   date(h.date, 'start of month', '+1 month', '-1 day') AS checkpoint_date
+            FROM main.assets_liabilities_history h
+            WHERE {_FOLDABLE} AND (h.checkpoint = 1 OR h.id IN (SELECT id FROM {ARCHIVE_SCHEMA}.assets_liabilities_history))
+        ''', (before,))
+        cursor.execute('''
+            DELETE FROM temp.folded WHERE (entry_id, checkpoint_date) IN (
+                SELECT entry_id, checkpoint_date FROM temp.folded
+                GROUP BY entry_id, checkpoint_date
+                HAVING COUNT(*) = 1 AND MIN(checkpoint) = 1
+            )
+        ''')
+
+        # Each row's share of the running totals (its difference, plus the opening value for an
+        # entry's first row) moves from its own date to its checkpoint's. The subcategory totals'
+        # triggers move the differences as the rows are replaced; opening values are moved here
+        cursor.execute('''
+            SELECT a.category, a.subcategory, f.date, f.checkpoint_date, COALESCE(f.difference, 0),
+                   CASE WHEN f.id = (SELECT MIN(id) FROM main.assets_liabilities_history WHERE asset_liability_id = f.entry_id)
+                        THEN COALESCE(f.old_value, 0) ELSE 0 END
+            FROM temp.folded f
+            JOIN assets_liabilities a ON a.id = f.entry_id
+            WHERE f.date != f.checkpoint_date
+        ''')
+        daily_changes = []
+        opening_moves = []
+        for category, subcategory, day, checkpoint_date, difference, opening in cursor.fetchall():
+            daily_changes += [(day, category, -(difference + opening)), (checkpoint_date, category, difference + opening)]
+            if opening:
+                opening_moves += [(category, subcategory, day, -opening), (category, subcategory, checkpoint_date, opening)]
+
+        cursor.execute("SELECT COUNT(*) FROM temp.folded")
+        folded = cursor.fetchone()[0]
+        cursor.execute("DELETE FROM main.assets_liabilities_history WHERE id IN (SELECT id FROM temp.folded)")
+        # A checkpoint takes the id of the first row it replaces, so an entry's first row stays first
+        cursor.execute('''
+            INSERT INTO main.assets_liabilities_history (id, asset_liability_id, date, old_value, new_value, difference, description, checkpoint)
+            SELECT g.first_id, g.entry_id, g.checkpoint_date, first.old_value, last.new_value, g.difference, ?, 1
+            FROM (
+                SELECT entry_id, checkpoint_date, MIN(id) AS first_id, MAX(id) AS last_id, TOTAL(difference) AS difference
+                FROM temp.folded
+                GROUP BY entry_id, checkpoint_date
+            ) g
+            JOIN temp.folded first ON first.id = g.first_id
+            JOIN temp.folded last ON last.id = g.last_id
+        ''', (CHECKPOINT_DESCRIPTION,))
+        checkpoints = cursor.rowcount
+
+        record_daily_changes(cursor, daily_changes)
+        cursor.executemany('''
+            INSERT INTO subcategory_daily_totals (category, subcategory, date, delta) VALUES (?, ?, ?, ?)
+            ON CONFLICT (category, subcategory, date) DO UPDATE SET delta = delta + excluded.delta
+        ''', opening_moves)
+        # Days whose changes all moved to a checkpoint no longer change anything
+        cursor.execute("DELETE FROM daily_totals WHERE date < ? AND ABS(delta) < ?", (before, ZERO_DELTA))
+        cursor.execute("DELETE FROM subcategory_daily_totals WHERE date < ? AND ABS(delta) < ?", (before, ZERO_DELTA))
+        cursor.execute("DROP TABLE temp.folded")
+    return CompactionResult(archived, folded, checkpoints)
+
+def entry_history(entry_id, include_archive=True):
+    # Every change recorded for an entry, in the order it was made, as (id, date, old_value,
+    # new_value, difference, description, checkpoint). With the archive, compacted months show the
+    # raw changes again instead of their checkpoints
+    conn = get_db_connection()
+    columns = "id, date, old_value, new_value, difference, description"
+    if not include_archive or not os.path.exists(archive_path(conn)):
+        return conn.execute(
+            f"SELECT {columns}, checkpoint FROM assets_liabilities_history WHERE asset_liability_id = ? ORDER BY id", (entry_id,)
+        ).fetchall()
+    attach(conn)
+    # A checkpoint has the id of the first raw row it replaced, so it is only shown when the archive
+    # lacks that row. UNION drops raw rows in both because a compaction was interrupted after archiving
+    return conn.execute(f'''
+        SELECT {columns}, checkpoint FROM main.assets_liabilities_history
+        WHERE asset_liability_id = ?
+        AND (checkpoint = 0 OR id NOT IN (SELECT id FROM {ARCHIVE_SCHEMA}.assets_liabilities_history WHERE asset_liability_id = ?))
+        UNION
+        SELECT {columns}, 0 FROM {ARCHIVE_SCHEMA}.assets_liabilities_history WHERE asset_liability_id = ?
+        ORDER BY id
+    ''', (entry_id, entry_id, entry_id)).fetchall()
+
+if __name__ == "__main__":
+    import argparse
+
+    from db_utils import create_table
+
+    parser = argparse.ArgumentParser(description="Compact old history into monthly checkpoints and query the archive")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    compact = subcommands.add_parser("compact", help="fold history older than the horizon into checkpoints")
+    compact.add_argument("--months", type=int, default=HISTORY_HORIZON_MONTHS, help="months of raw history to keep")
+    compact.add_argument("--archive", help="archive database (default: next to the main database)")
+    history = subcommands.add_parser("history", help="print an entry's full history, archived rows included")
+    history.add_argument("entry_id", type=int)
+    args = parser.parse_args()
+
+    create_table()
+    if args.command == "compact":
+        before = horizon_start(args.months)
+        result = compact_history(before, args.archive)
+        print(f"Archived {result.archived} rows and folded {result.folded} rows before {before} into {result.checkpoints} checkpoints.")
+    else:
+        for row in entry_history(args.entry_id):
+            print(*row, sep="\t")
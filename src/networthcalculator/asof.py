@@ -0,0 +1,75 @@
+# "As of" questions about the ledger: balances, totals and goal status on any past date, and the
+# change between two dates. Answered from a cumulative index over the history (via the
+# subcategory_daily_totals table), built once per data version, so each question is a binary
+# search per subcategory instead of a pass over the whole history
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from itertools import groupby
+
+from aggregates import LedgerSummary, Stats
+from engine import goals_for_summary
+
+@dataclass
+class BalanceChange:
+    category: str
+    subcategory: str
+    before: float
+    after: float
+
+    @property
+    def change(self):
+        return self.after - self.before
+
+@dataclass
+class CumulativeIndex:
+    # (category, subcategory) -> (dates, running balance after each date), both ascending
+    series: dict = field(default_factory=dict)
+
+    def balance(self, category, subcategory, day):
+        dates, balances = self.series.get((category, subcategory), ((), ()))
+        position = bisect_right(dates, str(day))
+        return balances[position - 1] if position else 0.0
+
+    def snapshot(self, day):
+        # The ledger's totals at the end of a day. Only totals are known for past dates,
+        # so the counts, minimums and maximums of the returned summary are left empty
+        summary = LedgerSummary()
+        for (category, subcategory), (dates, balances) in self.series.items():
+            position = bisect_right(dates, str(day))
+            if not position:
+                continue
+            stats = Stats(total=balances[position - 1])
+            summary.subcategories[(category, subcategory)] = stats
+            summary.categories.setdefault(category, Stats()).merge(stats)
+        return summary
+
+    def compare(self, start, end):
+        # Every subcategory whose balance differs between the end of two days
+        before, after = self.snapshot(start), self.snapshot(end)
+        changes = []
+        for key in sorted(set(before.subcategories) | set(after.subcategories)):
+            change = BalanceChange(*key, before.subcategory(*key).total, after.subcategory(*key).total)
+            if change.change:
+                changes.append(change)
+        return changes
+
+def build_index(conn):
+    # Running balances per subcategory from the trigger-maintained daily changes, which hold at
+    # most one row per subcategory and day however long the history is
+    rows = conn.execute(
+        "SELECT category, subcategory, date, delta FROM subcategory_daily_totals ORDER BY category, subcategory, date"
+    )
+    index = CumulativeIndex()
+    for key, day_rows in groupby(rows, key=lambda row: (row[0], row[1])):
+        dates, balances = [], []
+        balance = 0.0
+        for _, _, day, delta in day_rows:
+            balance += delta
+            dates.append(day)
+            balances.append(balance)
+        index.series[key] = (dates, balances)
+    return index
+
+def goals_as_of(conn, index, day):
+    # Every goal measured against the balances at the end of a day
+    return goals_for_summary(conn, index.snapshot(day))
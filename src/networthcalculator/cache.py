@@ -0,0 +1,92 @@
+import sys
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import profiling
+from db_utils import data_version
+
+# Bounds for the process-wide cache shared by all sessions
+MAX_ENTRIES = 256
+MAX_BYTES = 256 * 1024 * 1024  # 256 MiB
+
+def estimate_size(value):
+    # Rough in-memory size of a cached result, good enough to keep the cache bounded
+    if hasattr(value, 'memory_usage'):  # pandas DataFrame / Series
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if hasattr(usage, 'sum') else int(usage)
+    if hasattr(value, 'nbytes'):  # numpy arrays
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    if hasattr(value, '__dict__'):
+        return sys.getsizeof(value) + estimate_size(vars(value))
+    return sys.getsizeof(value)
+
+class ResultCache:
+    # LRU cache whose entries are only valid for the data version they were computed at
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (version, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key, version, value):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[2]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (version, value, size)
+            self._bytes += size
+            # Evict least recently used results until we are back within bounds
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+result_cache = ResultCache()
+
+def versioned_cache(func):
+    # Cache a read function's result until the next write; results are shared between
+    # sessions, so callers must treat them as read-only
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())))
+        version = data_version()
+        with profiling.block(f"cache: {func.__name__}") as timing:
+            hit, value = result_cache.get(key, version)
+            if hit:
+                timing.name += " (hit)"
+                return value
+            value = func(*args, **kwargs)
+            result_cache.put(key, version, value)
+        return value
+    return wrapper
@@ -0,0 +1,64 @@
+# Chart data for the time-series plots: long series are downsampled to a point budget with
+# Largest-Triangle-Three-Buckets, which keeps peaks and troughs, and drawn with WebGL traces
+import numpy as np
+import plotly.graph_objects as go
+
+# Most points sent to the browser per chart, shared between its traces
+POINT_BUDGET = 4000
+# Each trace keeps at least this many points however many traces share a chart
+MIN_TRACE_POINTS = 200
+# Traces with more points than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 1000
+# Markers are only drawn on traces with at most this many points
+MARKER_THRESHOLD = 200
+
+def trace_budget(traces, budget=POINT_BUDGET):
+    return max(MIN_TRACE_POINTS, budget // max(traces, 1))
+
+def lttb_indices(x, y, budget):
+    # Positions of the points LTTB keeps: the first, the last, and from each of budget - 2
+    # equal buckets in between the point forming the largest triangle with its neighbours
+    n = len(x)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(budget - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # The third corner is the average of the next bucket (the last point for the last bucket)
+        if bucket == budget - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_x, next_y = x[end:edges[bucket + 2]].mean(), y[end:edges[bucket + 2]].mean()
+        areas = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(areas.argmax())
+        selected[bucket + 1] = previous
+    return selected
+
+def downsample(index, values, budget):
+    # (x, y) of one series reduced to at most budget points; index may hold dates
+    index = np.asarray(index)
+    values = np.asarray(values, dtype=float)
+    numeric = index.astype('datetime64[ns]').astype(np.int64) if np.issubdtype(index.dtype, np.datetime64) else index
+    keep = lttb_indices(numeric, values, budget)
+    return index[keep], values[keep]
+
+def window(frame, start=None, end=None):
+    # Rows of a date-indexed DataFrame between two dates, both included
+    if start is None and end is None:
+        return frame
+    return frame.loc[np.datetime64(start, 'ns') if start else None:np.datetime64(end, 'ns') if end else None]
+
+def time_series_trace(index, values, name, budget, **kwargs):
+    # Scatter trace for a date-indexed series, downsampled and switched to WebGL when it is long
+    x, y = downsample(index, values, budget)
+    trace_type = go.Scattergl if len(x) > WEBGL_THRESHOLD else go.Scatter
+    mode = 'lines+markers' if len(x) <= MARKER_THRESHOLD else 'lines'
+    return trace_type(x=x, y=y, mode=mode, name=name, **kwargs)
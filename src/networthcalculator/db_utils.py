@@ -1,5 +1,11 @@
 import sqlite3
 import os
+import threading
+from contextlib import contextmanager
+from datetime import date
+
+import profiling
+from aggregates import CATEGORIES
 
 #Define allowed categories
 ASSET_CATEGORIES = [
@@ -36,15 +42,273 @@ CASHFLOW_CATEGORIES = [
         "Other"
     ]
 
-def create_table():
-    # Ensure the data folder exists
-    data_folder = os.path.join(os.path.dirname(__file__), 'data')
-    os.makedirs(data_folder, exist_ok=True)
-    db_path = os.path.join(data_folder, 'networth.db')
+# Location of the SQLite database, resolved once per process
+DATA_FOLDER = os.path.join(os.path.dirname(__file__), 'data')
+DB_PATH = os.path.join(DATA_FOLDER, 'networth.db')
+
+# Tuning applied to every pooled connection
+CONNECTION_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA mmap_size = 268435456",  # 256 MiB
+    "PRAGMA cache_size = -65536",  # 64 MiB
+    "PRAGMA temp_store = MEMORY",
+]
+# Sorts after every ISO date, used as an open upper bound in date range updates
+LAST_DAY = "9999-12-31"
+# SQLite limits the number of bound parameters, so large IN (...) lookups are split up
+LOOKUP_CHUNK_SIZE = 500
+# Entries store their date as a number of days since 1970-01-01, the day with this julianday()
+EPOCH_JULIAN_DAY = 2440587.5
+# Number of prepared statements kept per connection
+STATEMENT_CACHE_SIZE = 256
+# Idle connections kept around for the next thread that needs one
+MAX_IDLE_CONNECTIONS = 8
+
+class PooledConnection(sqlite3.Connection):
+    # Connections are owned by the pool, so close() only abandons uncommitted work
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        super().close()
+
+    # Statements go through cursor() so that profiled reruns can time them (see profiling.py)
+    def cursor(self, factory=None):
+        if factory is None:
+            factory = profiling.ProfiledCursor if profiling.active_run() is not None else sqlite3.Cursor
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, parameters):
+        return self.cursor().executemany(sql, parameters)
+
+class ConnectionPool:
+    def __init__(self, path, max_idle=MAX_IDLE_CONNECTIONS):
+        self.path = path
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+        self._folder_ready = False
+        self._watcher = None
+        self.closed = False
+
+    def _connect(self):
+        if not self._folder_ready:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._folder_ready = True
+        # Autocommit mode, writes are grouped explicitly with transaction()
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=PooledConnection,
+        )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            if not self.closed and len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close_for_real()
+
+    def data_version(self):
+        # SQLite's data_version on a connection kept for this alone. It changes whenever another
+        # connection commits, whether a pooled one, a command-line job or another server process.
+        # Read through a plain cursor so profiled reruns do not log it
+        with self._lock:
+            if self._watcher is None:
+                self._watcher = self._connect()
+            return self._watcher.cursor(sqlite3.Cursor).execute("PRAGMA data_version").fetchone()[0]
+
+    def close_all(self):
+        with self._lock:
+            self.closed = True
+            idle, self._idle = self._idle, []
+            if self._watcher is not None:
+                idle.append(self._watcher)
+                self._watcher = None
+        for conn in idle:
+            conn.close_for_real()
+
+class _Lease:
+    # Holds a pooled connection for the lifetime of one thread, handing it back when the thread ends
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = pool.acquire()
+
+    def __del__(self):
+        self.pool.release(self.conn)
+
+_pool = ConnectionPool(DB_PATH)
+_local = threading.local()
+
+def get_db_connection():
+    # Each thread (and so each Streamlit script run) reuses one pooled connection
+    lease = getattr(_local, 'lease', None)
+    if lease is None or lease.pool is not _pool:
+        lease = _Lease(_pool)
+        _local.lease = lease
+    return lease.conn
+
+def use_database(path):
+    # Point the app at a different database file, e.g. a generated ledger in the benchmarks
+    global _pool, _migrations_done
+    old_pool, _pool = _pool, ConnectionPool(path)
+    old_pool.close_all()
+    _migrations_done = False
+    # Nothing cached for the previous database is valid any more
+    bump_data_version()
 
-    # Connect to the database (it will be created if it doesn't exist)
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+# Incremented whenever the database changes so cached reads know when to refresh. Writes are
+# noticed through SQLite's data_version, so commits from outside this process count as well
+_data_version = 0
+_last_seen = None  # (pool, SQLite data_version) at the last check
+_data_version_lock = threading.Lock()
+
+def data_version():
+    global _data_version, _last_seen
+    pool = _pool
+    seen = (pool, pool.data_version())
+    with _data_version_lock:
+        if seen != _last_seen:
+            _last_seen = seen
+            _data_version += 1
+        return _data_version
+
+def bump_data_version():
+    global _data_version
+    with _data_version_lock:
+        _data_version += 1
+
+@contextmanager
+def transaction():
+    # Run a block of writes atomically; nested blocks become savepoints of the outer transaction
+    conn = get_db_connection()
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT nested")
+        try:
+            yield conn.cursor()
+        except BaseException:
+            conn.execute("ROLLBACK TO nested")
+            conn.execute("RELEASE nested")
+            raise
+        conn.execute("RELEASE nested")
+        return
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn.cursor()
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+
+@contextmanager
+def read_transaction(conn):
+    # Run several reads against one snapshot of the database: under WAL, a deferred transaction
+    # keeps seeing what was committed when its first read started. Inside a transaction already
+    # open on the connection, the reads simply share it
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute("BEGIN")
+    try:
+        yield
+    finally:
+        conn.commit()
+
+def day_number_sql(expression):
+    # SQL turning an ISO date into a stored day number, NULL if SQLite cannot read the date
+    return f"CAST(julianday({expression}) - {EPOCH_JULIAN_DAY} AS INTEGER)"
+
+def iso_date_sql(expression):
+    # SQL turning a stored day number back into an ISO date
+    return f"date({expression} + {EPOCH_JULIAN_DAY})"
+
+def iso_date(day):
+    # The ISO date of a stored day number, in Python
+    return date.fromordinal(_EPOCH_ORDINAL + day).isoformat()
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def cents_sql(expression):
+    return f"CAST(ROUND({expression} * 100) AS INTEGER)"
+
+# Entries as the app shows them, with category names, ISO dates and values in euros. This is the
+# assets_liabilities view's query; reads that need the names can extend it with WHERE and ORDER BY
+# on the stored columns (e.day, e.value_cents, ...) so SQLite can still use the entries indexes
+ENTRY_SELECT = f'''
+    SELECT e.id, {iso_date_sql('e.day')} AS date, c.name AS category, s.name AS subcategory,
+           e.description, e.value_cents / 100.0 AS value
+    FROM entries e
+    JOIN categories c ON c.id = e.category_id
+    JOIN subcategories s ON s.id = e.subcategory_id
+'''
+
+def lookup_ids(cursor, table, names):
+    # name -> id in the categories or subcategories table, adding the names it does not have yet
+    names = list(dict.fromkeys(names))
+    cursor.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(name,) for name in names])
+    ids = {}
+    for start in range(0, len(names), LOOKUP_CHUNK_SIZE):
+        chunk = names[start:start + LOOKUP_CHUNK_SIZE]
+        cursor.execute(f"SELECT name, id FROM {table} WHERE name IN ({', '.join('?' * len(chunk))})", chunk)
+        ids.update(cursor.fetchall())
+    return ids
+
+_INSERT_ENTRY = f'''
+    INSERT INTO entries (id, day, category_id, subcategory_id, description, value_cents)
+    VALUES (?, {day_number_sql('?')}, ?, ?, ?, {cents_sql('?')})
+'''
+
+def _entry_params(cursor, rows):
+    categories = lookup_ids(cursor, "categories", [row[2] for row in rows])
+    subcategories = lookup_ids(cursor, "subcategories", [row[3] for row in rows])
+    return [
+        (entry_id, str(entry_date), categories[category], subcategories[subcategory], description, value)
+        for entry_id, entry_date, category, subcategory, description, value in rows
+    ]
+
+def insert_entry_rows(cursor, rows):
+    # Write (id, date, category, subcategory, description, value) rows straight into the entries
+    # table, for bulk writers; an id of None takes the next free one
+    cursor.executemany(_INSERT_ENTRY, _entry_params(cursor, rows))
+
+@contextmanager
+def deferred_search_index(cursor, first_id, last_id):
+    # For bulk writers, inside their transaction: entries first_id..last_id and their history rows
+    # written in the block are added to the full-text indexes with one statement per index at the
+    # end, which is several times faster than the insert triggers indexing them row by row
+    cursor.execute("INSERT INTO search_index_paused (paused) VALUES (1)")
+    yield
+    cursor.execute("DELETE FROM search_index_paused")
+    cursor.execute(
+        "INSERT INTO entries_fts (rowid, description) SELECT id, description FROM entries WHERE id BETWEEN ? AND ?",
+        (first_id, last_id)
+    )
+    cursor.execute(
+        "INSERT INTO history_fts (rowid, description) SELECT id, description FROM assets_liabilities_history WHERE asset_liability_id BETWEEN ? AND ?",
+        (first_id, last_id)
+    )
+
+def _create_base_tables(cursor):
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS assets_liabilities (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -73,23 +337,693 @@ def create_table():
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS goals (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
-            goal TEXT NOT NULL,
+            goal_type TEXT NOT NULL,
             goal_subcategory TEXT NOT NULL,
             goal_amount REAL NOT NULL,
-            progress REAL NOT NULL,
+            progress REAL,
             description TEXT
         )
     ''')
-    
-    conn.commit()
-    conn.close()
 
-def get_db_connection():
-    # Ensure the data folder exists
-    data_folder = os.path.join(os.path.dirname(__file__), 'data')
-    os.makedirs(data_folder, exist_ok=True)
-    db_path = os.path.join(data_folder, 'networth.db')
+    # Create the daily running totals table used by the net worth timeline
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_totals (
+            date TEXT NOT NULL,
+            category TEXT NOT NULL,
+            delta REAL NOT NULL,
+            running_total REAL NOT NULL,
+            PRIMARY KEY (date, category)
+        )
+    ''')
+
+    # Backfill the running totals for databases created before the table existed
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM daily_totals)")
+    has_totals = cursor.fetchone()[0]
+    cursor.execute("SELECT EXISTS (SELECT 1 FROM assets_liabilities_history)")
+    has_history = cursor.fetchone()[0]
+    if has_history and not has_totals:
+        rebuild_daily_totals(cursor)
+
+def _unify_goals_schema(cursor):
+    # Older databases have either a 'goal' or a nullable 'goal_type' column, depending on which
+    # code path created the table first, so copy them into the single layout used by the app
+    cursor.execute("PRAGMA table_info(goals)")
+    columns = {row[1]: row for row in cursor.fetchall()}
+    goal_type_not_null = columns.get('goal_type', (None,) * 4)[3]
+    if goal_type_not_null and 'description' in columns and 'goal' not in columns:
+        return
+
+    goal_type = 'goal_type' if 'goal_type' in columns else 'goal'
+    progress = 'progress' if 'progress' in columns else 'NULL'
+    description = 'description' if 'description' in columns else 'NULL'
+    cursor.execute('''
+        CREATE TABLE goals_new (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            goal_type TEXT NOT NULL,
+            goal_subcategory TEXT NOT NULL,
+            goal_amount REAL NOT NULL,
+            progress REAL,
+            description TEXT
+        )
+    ''')
+    cursor.execute(f'''
+        INSERT INTO goals_new (id, goal_type, goal_subcategory, goal_amount, progress, description)
+        SELECT id, {goal_type}, goal_subcategory, goal_amount, {progress}, {description}
+        FROM goals
+        WHERE {goal_type} IS NOT NULL AND goal_subcategory IS NOT NULL AND goal_amount IS NOT NULL
+    ''')
+    cursor.execute("DROP TABLE goals")
+    cursor.execute("ALTER TABLE goals_new RENAME TO goals")
+
+def _create_indexes(cursor):
+    # Covers the per category/subcategory filters and the SUM/COUNT/AVG aggregates over them
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_liabilities_category ON assets_liabilities (category, subcategory, value)")
+    # Covers date ordering and the per date/subcategory trends
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_assets_liabilities_date ON assets_liabilities (date, subcategory, value)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_history_entry_date ON assets_liabilities_history (asset_liability_id, date)")
+    # Covers the running total lookups and updates done on every write
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_daily_totals_category_date ON daily_totals (category, date)")
+
+# Rollup tables kept up to date by triggers, and the strftime period each one groups entries by
+PERIOD_ROLLUPS = {
+    "monthly_totals": "%Y-%m",
+    "yearly_totals": "%Y",
+}
+
+def _text_entry_columns(row):
+    # (date, category, subcategory, value) of a row of the original assets_liabilities table
+    return f"{row}.date", f"{row}.category", f"{row}.subcategory", f"{row}.value"
+
+def _entry_columns(row):
+    # The same four values for a row of the entries table
+    return (
+        iso_date_sql(f"{row}.day"),
+        f"(SELECT name FROM categories WHERE id = {row}.category_id)",
+        f"(SELECT name FROM subcategories WHERE id = {row}.subcategory_id)",
+        f"{row}.value_cents / 100.0",
+    )
+
+def _rollup_add(table, period_format, columns, sign):
+    # Trigger statements that add (sign '+') or remove (sign '-') one entry from a rollup table;
+    # columns are the entry's (date, category, subcategory, value) as SQL expressions
+    day, category, subcategory, value = columns
+    period = f"strftime('{period_format}', {day})"
+    if sign == '+':
+        return f'''
+            INSERT INTO {table} (period, category, subcategory, total, entries)
+            SELECT {period}, {category}, {subcategory}, {value}, 1
+            WHERE {period} IS NOT NULL
+            ON CONFLICT (period, category, subcategory)
+            DO UPDATE SET total = total + excluded.total, entries = entries + 1;
+        '''
+    return f'''
+        UPDATE {table} SET total = total - {value}, entries = entries - 1
+        WHERE period = {period} AND category = {category} AND subcategory = {subcategory};
+        DELETE FROM {table}
+        WHERE period = {period} AND category = {category} AND subcategory = {subcategory} AND entries <= 0;
+    '''
+
+def _create_rollup_triggers(cursor, entries_table, columns, changed_columns):
+    # Keep every rollup table in step with inserts, updates and deletes on the entries table
+    for table, period_format in PERIOD_ROLLUPS.items():
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {entries_table}
+            BEGIN {_rollup_add(table, period_format, columns('NEW'), '+')} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {entries_table}
+            BEGIN {_rollup_add(table, period_format, columns('OLD'), '-')} END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF {changed_columns} ON {entries_table}
+            BEGIN {_rollup_add(table, period_format, columns('OLD'), '-')} {_rollup_add(table, period_format, columns('NEW'), '+')} END
+        ''')
+
+def rebuild_period_rollups(cursor):
+    # Regenerate the monthly and yearly rollups from the entries table
+    for table, period_format in PERIOD_ROLLUPS.items():
+        cursor.execute(f"DELETE FROM {table}")
+        cursor.execute(f'''
+            INSERT INTO {table} (period, category, subcategory, total, entries)
+            SELECT strftime(?, date) AS period, category, subcategory, SUM(value), COUNT(*)
+            FROM assets_liabilities
+            WHERE period IS NOT NULL
+            GROUP BY period, category, subcategory
+        ''', (period_format,))
+
+def _create_period_rollups(cursor):
+    # Per period, category and subcategory totals, so the trend charts read a few hundred
+    # pre-aggregated rows instead of grouping the whole ledger by a computed date expression
+    for table, period_format in PERIOD_ROLLUPS.items():
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                period TEXT NOT NULL,
+                category TEXT NOT NULL,
+                subcategory TEXT NOT NULL,
+                total REAL NOT NULL,
+                entries INTEGER NOT NULL,
+                PRIMARY KEY (period, category, subcategory)
+            ) WITHOUT ROWID
+        ''')
+    _create_rollup_triggers(cursor, "assets_liabilities", _text_entry_columns, "date, category, subcategory, value")
+    rebuild_period_rollups(cursor)
+
+def rebuild_subcategory_daily_totals(cursor):
+    # Regenerate the per subcategory daily changes from the history, with the same amounts as
+    # rebuild_daily_totals: every row's difference plus the old value of an entry's first row
+    cursor.execute("DELETE FROM subcategory_daily_totals")
+    cursor.execute('''
+        INSERT INTO subcategory_daily_totals (category, subcategory, date, delta)
+        SELECT category, subcategory, date, SUM(amount)
+        FROM (
+            SELECT a.category, a.subcategory, h.date, h.difference AS amount
+            FROM assets_liabilities_history h
+            JOIN assets_liabilities a ON h.asset_liability_id = a.id
+            UNION ALL
+            SELECT a.category, a.subcategory, h.date, h.old_value
+            FROM (
+                SELECT MIN(id) AS id FROM assets_liabilities_history GROUP BY asset_liability_id
+            ) first
+            JOIN assets_liabilities_history h ON h.id = first.id
+            JOIN assets_liabilities a ON h.asset_liability_id = a.id
+        )
+        WHERE amount IS NOT NULL AND date IS NOT NULL
+        GROUP BY category, subcategory, date
+    ''')
+
+def _create_subcategory_daily_totals(cursor):
+    # Net change per subcategory and day, the source of the as-of balances in asof.py. Triggers on
+    # the history table keep it current; the entry's own row supplies category and subcategory
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subcategory_daily_totals (
+            category TEXT NOT NULL,
+            subcategory TEXT NOT NULL,
+            date TEXT NOT NULL,
+            delta REAL NOT NULL,
+            PRIMARY KEY (category, subcategory, date)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS subcategory_daily_totals_insert AFTER INSERT ON assets_liabilities_history
+        WHEN NEW.difference IS NOT NULL AND NEW.date IS NOT NULL
+        BEGIN
+            INSERT INTO subcategory_daily_totals (category, subcategory, date, delta)
+            SELECT category, subcategory, NEW.date, NEW.difference
+            FROM assets_liabilities WHERE id = NEW.asset_liability_id
+            ON CONFLICT (category, subcategory, date) DO UPDATE SET delta = delta + excluded.delta;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS subcategory_daily_totals_delete AFTER DELETE ON assets_liabilities_history
+        WHEN OLD.difference IS NOT NULL AND OLD.date IS NOT NULL
+        BEGIN
+            UPDATE subcategory_daily_totals SET delta = delta - OLD.difference
+            WHERE (category, subcategory) = (SELECT category, subcategory FROM assets_liabilities WHERE id = OLD.asset_liability_id)
+            AND date = OLD.date;
+        END
+    ''')
+    rebuild_subcategory_daily_totals(cursor)
+
+# Rows kept in entry_changes; a copy of the ledger that has fallen further behind reloads in full
+ENTRY_CHANGES_KEPT = 10000
+
+def _create_entry_change_triggers(cursor, entries_table, changed_columns):
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS entry_changes_update AFTER UPDATE OF {changed_columns} ON {entries_table}
+        BEGIN
+            INSERT INTO entry_changes (entry_id) VALUES (OLD.id);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS entry_changes_delete AFTER DELETE ON {entries_table}
+        BEGIN
+            INSERT INTO entry_changes (entry_id) VALUES (OLD.id);
+        END
+    ''')
+
+def _create_entry_changes(cursor):
+    # Ids of entries edited or deleted, in order, so in-memory copies of the ledger (ledger.py)
+    # can catch up without reloading. New entries need no log: their ids only ever grow
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS entry_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL
+        )
+    ''')
+    _create_entry_change_triggers(cursor, "assets_liabilities", "date, category, subcategory, value")
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS entry_changes_trim AFTER INSERT ON entry_changes
+        WHEN NEW.seq % 1000 = 0
+        BEGIN
+            DELETE FROM entry_changes WHERE seq <= NEW.seq - {ENTRY_CHANGES_KEPT};
+        END
+    ''')
+
+def _create_legacy_dates(cursor):
+    # Original text of entry dates SQLite cannot read (their day is NULL), so nothing written into
+    # the old TEXT date column is lost. A row goes once its entry gets a readable date or is
+    # deleted; `db_utils.py legacy-dates` lists the ones left to fix
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS legacy_dates (
+            entry_id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS legacy_dates_dated AFTER UPDATE OF day ON entries
+        WHEN NEW.day IS NOT NULL
+        BEGIN
+            DELETE FROM legacy_dates WHERE entry_id = NEW.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS legacy_dates_delete AFTER DELETE ON entries
+        BEGIN
+            DELETE FROM legacy_dates WHERE entry_id = OLD.id;
+        END
+    ''')
+
+def _create_entry_view_triggers(cursor):
+    # Inserts and updates through the assets_liabilities view, which take names and ISO dates. A
+    # date SQLite cannot read is kept in legacy_dates, as the migration does for existing rows
+    cursor.execute(f'''
+        CREATE TRIGGER assets_liabilities_insert INSTEAD OF INSERT ON assets_liabilities
+        BEGIN
+            INSERT OR IGNORE INTO categories (name) VALUES (NEW.category);
+            INSERT OR IGNORE INTO subcategories (name) VALUES (NEW.subcategory);
+            INSERT INTO entries (id, day, category_id, subcategory_id, description, value_cents)
+            VALUES (
+                NEW.id, {day_number_sql('NEW.date')},
+                (SELECT id FROM categories WHERE name = NEW.category),
+                (SELECT id FROM subcategories WHERE name = NEW.subcategory),
+                NEW.description, {cents_sql('NEW.value')}
+            );
+            INSERT INTO legacy_dates (entry_id, date)
+            SELECT last_insert_rowid(), NEW.date WHERE NEW.date IS NOT NULL AND {day_number_sql('NEW.date')} IS NULL;
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER assets_liabilities_update INSTEAD OF UPDATE ON assets_liabilities
+        BEGIN
+            INSERT OR IGNORE INTO categories (name) VALUES (NEW.category);
+            INSERT OR IGNORE INTO subcategories (name) VALUES (NEW.subcategory);
+            UPDATE entries SET
+                day = {day_number_sql('NEW.date')},
+                category_id = (SELECT id FROM categories WHERE name = NEW.category),
+                subcategory_id = (SELECT id FROM subcategories WHERE name = NEW.subcategory),
+                description = NEW.description,
+                value_cents = {cents_sql('NEW.value')}
+            WHERE id = OLD.id;
+            INSERT OR REPLACE INTO legacy_dates (entry_id, date)
+            SELECT OLD.id, NEW.date WHERE NEW.date IS NOT NULL AND {day_number_sql('NEW.date')} IS NULL;
+        END
+    ''')
+
+def _normalise_entries(cursor):
+    # Move the entries into a compact table: category and subcategory as ids into lookup tables
+    # seeded from the lists above, dates as day numbers and values as whole cents. The old name
+    # becomes a view with the same columns as before, writable through INSTEAD OF triggers, so
+    # exports, hand-written SQL and older scripts still see readable names. Everything happens in
+    # the migration's transaction, so other connections keep reading the old table until it commits
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS subcategories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        )
+    ''')
+    lookup_ids(cursor, "categories", CATEGORIES)
+    lookup_ids(cursor, "subcategories", ASSET_CATEGORIES + LIABILITY_CATEGORIES + CASHFLOW_CATEGORIES)
+    # day is NULL for the odd legacy date SQLite cannot read, which the old TEXT column allowed;
+    # the original text of those is kept in legacy_dates
+    cursor.execute('''
+        CREATE TABLE entries (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            day INTEGER,
+            category_id INTEGER NOT NULL REFERENCES categories (id),
+            subcategory_id INTEGER NOT NULL REFERENCES subcategories (id),
+            description TEXT NOT NULL,
+            value_cents INTEGER NOT NULL
+        )
+    ''')
+
+    cursor.execute("INSERT OR IGNORE INTO categories (name) SELECT DISTINCT category FROM assets_liabilities")
+    cursor.execute("INSERT OR IGNORE INTO subcategories (name) SELECT DISTINCT subcategory FROM assets_liabilities")
+    cursor.execute(f'''
+        INSERT INTO entries (id, day, category_id, subcategory_id, description, value_cents)
+        SELECT a.id, {day_number_sql('a.date')}, c.id, s.id, a.description, {cents_sql('a.value')}
+        FROM assets_liabilities a
+        JOIN categories c ON c.name = a.category
+        JOIN subcategories s ON s.name = a.subcategory
+        ORDER BY a.id
+    ''')
+    _create_legacy_dates(cursor)
+    cursor.execute(f'''
+        INSERT INTO legacy_dates (entry_id, date)
+        SELECT id, date FROM assets_liabilities WHERE date IS NOT NULL AND {day_number_sql('date')} IS NULL
+    ''')
+    # Ids of deleted entries are never handed out again, so carry the old table's counter over
+    cursor.execute('''
+        UPDATE sqlite_sequence SET seq = MAX(seq, (SELECT seq FROM sqlite_sequence WHERE name = 'assets_liabilities'))
+        WHERE name = 'entries' AND EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'assets_liabilities')
+    ''')
+    cursor.execute('''
+        INSERT INTO sqlite_sequence (name, seq)
+        SELECT 'entries', seq FROM sqlite_sequence
+        WHERE name = 'assets_liabilities' AND NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'entries')
+    ''')
+
+    # Dropping the table also drops its indexes and the rollup and entry_changes triggers,
+    # which are recreated on the new table below
+    cursor.execute("DROP TABLE assets_liabilities")
+    cursor.execute(f"CREATE VIEW assets_liabilities AS {ENTRY_SELECT}")
+    _create_entry_view_triggers(cursor)
+    cursor.execute('''
+        CREATE TRIGGER assets_liabilities_delete INSTEAD OF DELETE ON assets_liabilities
+        BEGIN
+            DELETE FROM entries WHERE id = OLD.id;
+        END
+    ''')
+
+    # Covering indexes for the grouped totals and trends, now on integer keys, plus one that gives
+    # the View/Edit pages their category's entries in date order without sorting them
+    cursor.execute("CREATE INDEX idx_entries_category ON entries (category_id, subcategory_id, day, value_cents)")
+    cursor.execute("CREATE INDEX idx_entries_day ON entries (day, subcategory_id, value_cents)")
+    cursor.execute("CREATE INDEX idx_entries_category_day ON entries (category_id, day)")
+    changed_columns = "day, category_id, subcategory_id, value_cents"
+    _create_rollup_triggers(cursor, "entries", _entry_columns, changed_columns)
+    _create_entry_change_triggers(cursor, "entries", changed_columns)
+
+def _add_history_checkpoints(cursor):
+    # Flags the monthly checkpoint rows that history compaction (archive.py) folds old changes
+    # into, so they can be told apart from the raw changes, which move to the archive database
+    cursor.execute("ALTER TABLE assets_liabilities_history ADD COLUMN checkpoint INTEGER NOT NULL DEFAULT 0")
+
+def _keep_legacy_dates(cursor):
+    # Databases normalised before legacy_dates existed get it now. The dates they already lost
+    # cannot be recovered, but unreadable dates written through the view from now on are kept
+    _create_legacy_dates(cursor)
+    cursor.execute("DROP TRIGGER IF EXISTS assets_liabilities_insert")
+    cursor.execute("DROP TRIGGER IF EXISTS assets_liabilities_update")
+    _create_entry_view_triggers(cursor)
+
+def _create_full_text_index(cursor, fts_table, content_table):
+    # External-content FTS5 index over a table's descriptions: it stores only the index, not a
+    # second copy of the text, and the triggers keep it in step with every insert, update and delete.
+    # Prefix indexes on 2 and 3 characters keep search-as-you-type lookups on short prefixes fast.
+    # New rows are indexed one by one unless a bulk writer has paused that (see deferred_search_index)
+    cursor.execute(f'''
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+            description, content='{content_table}', content_rowid='id',
+            prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+        )
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {content_table}
+        WHEN NOT EXISTS (SELECT 1 FROM search_index_paused)
+        BEGIN
+            INSERT INTO {fts_table} (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {content_table}
+        BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+        END
+    ''')
+    cursor.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {fts_table}_update AFTER UPDATE OF description ON {content_table}
+        WHEN OLD.description IS NOT NEW.description
+        BEGIN
+            INSERT INTO {fts_table} ({fts_table}, rowid, description) VALUES ('delete', OLD.id, OLD.description);
+            INSERT INTO {fts_table} (rowid, description) VALUES (NEW.id, NEW.description);
+        END
+    ''')
+    cursor.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+def _create_search_indexes(cursor):
+    # Full-text search over the descriptions of the entries and of their history for View/Edit,
+    # plus an index that serves its value range filter and sorting a category by value. A row in
+    # search_index_paused only ever exists inside a bulk writer's own transaction
+    cursor.execute("CREATE TABLE IF NOT EXISTS search_index_paused (paused INTEGER)")
+    _create_full_text_index(cursor, "entries_fts", "entries")
+    _create_full_text_index(cursor, "history_fts", "assets_liabilities_history")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_entries_category_value ON entries (category_id, value_cents)")
+
+# Schema migrations in the order they were introduced; the database's PRAGMA user_version
+# records how many of them have already been applied. Only ever append to this list.
+MIGRATIONS = [
+    _create_base_tables,
+    _unify_goals_schema,
+    _create_indexes,
+    _create_period_rollups,
+    _create_subcategory_daily_totals,
+    _create_entry_changes,
+    _normalise_entries,
+    _add_history_checkpoints,
+    _create_search_indexes,
+    _keep_legacy_dates,
+]
+
+_migrations_done = False
+_migrations_lock = threading.Lock()
+
+def run_migrations():
+    # Bring the database schema up to date, at most once per process
+    global _migrations_done
+    if _migrations_done:
+        return
+    with _migrations_lock:
+        if _migrations_done:
+            return
+        version = get_db_connection().execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            # Each migration and its version bump are applied atomically
+            with transaction() as cursor:
+                migration(cursor)
+                cursor.execute(f"PRAGMA user_version = {number}")
+        _migrations_done = True
+
+def create_table():
+    # Kept for existing callers, the schema itself is managed by the migrations above
+    run_migrations()
+
+def record_daily_change(cursor, day, category, amount):
+    # Apply a single ledger change to the persisted running totals
+    record_daily_changes(cursor, [(day, category, amount)])
+
+def record_daily_changes(cursor, changes):
+    # Apply many (day, category, amount) ledger changes to the persisted running totals at once
+    pending = {}
+    for day, category, amount in changes:
+        if amount and category is not None:
+            key = (category, str(day))
+            pending[key] = pending.get(key, 0) + amount
+    pending = sorted((category, day, amount) for (category, day), amount in pending.items() if amount)
+    if not pending:
+        return
+
+    # Make sure each day has a row, starting from the last known running total
+    cursor.executemany('''
+        INSERT OR IGNORE INTO daily_totals (date, category, delta, running_total)
+        VALUES (?, ?, 0, COALESCE((
+            SELECT running_total FROM daily_totals
+            WHERE category = ? AND date < ?
+            ORDER BY date DESC LIMIT 1
+        ), 0))
+    ''', [(day, category, category, day) for category, day, _ in pending])
+
+    cursor.executemany(
+        "UPDATE daily_totals SET delta = delta + ? WHERE date = ? AND category = ?",
+        [(amount, day, category) for category, day, amount in pending]
+    )
+
+    # Running totals from one changed day up to the next all move by the changes made so far,
+    # so each stretch of days is only updated once
+    shifts = []
+    shift = 0
+    for index, (category, day, amount) in enumerate(pending):
+        if index == 0 or pending[index - 1][0] != category:
+            shift = 0
+        shift += amount
+        following = pending[index + 1] if index + 1 < len(pending) else None
+        until = following[1] if following and following[0] == category else LAST_DAY
+        shifts.append((shift, category, day, until))
+    cursor.executemany(
+        "UPDATE daily_totals SET running_total = running_total + ? WHERE category = ? AND date >= ? AND date < ?",
+        shifts
+    )
+
+def reverse_entry_totals(cursor, rowid):
+    # Take back everything an entry contributed to the running totals before it is deleted
+    cursor.execute("SELECT category FROM assets_liabilities WHERE id = ?", (rowid,))
+    result = cursor.fetchone()
+    if not result:
+        return
+    category = result[0]
+    cursor.execute(
+        "SELECT date, old_value, difference FROM assets_liabilities_history WHERE asset_liability_id = ? ORDER BY id",
+        (rowid,)
+    )
+    changes = []
+    for index, (day, old_value, difference) in enumerate(cursor.fetchall()):
+        # The first recorded history row also carries the entry's starting value
+        if index == 0 and old_value is not None:
+            changes.append((day, category, -old_value))
+        changes.append((day, category, -(difference or 0)))
+    record_daily_changes(cursor, changes)
+
+def insert_entry(entry_date, category, subcategory, description, value):
+    # Add a ledger entry together with its opening history row; returns the new entry's id
+    entry_date = str(entry_date)
+    with transaction() as cursor:
+        cursor.execute(_INSERT_ENTRY, _entry_params(cursor, [(None, entry_date, category, subcategory, description, value)])[0])
+        # Get the last inserted row ID
+        entry_id = cursor.lastrowid
+        # Insert into assets_liabilities_history
+        cursor.execute(
+            "INSERT INTO assets_liabilities_history (asset_liability_id, date, old_value, new_value, difference, description) VALUES (?, ?, ?, ?, ?, ?)",
+            (entry_id, entry_date, 0, value, value, description)
+        )
+        record_daily_change(cursor, entry_date, category, value)
+    return entry_id
+
+def delete_entry(rowid):
+    delete_entries([rowid])
+
+def delete_entries(rowids):
+    rowids = list(rowids)
+    if not rowids:
+        return
+    with transaction() as cursor:
+        # Take the entries out of the running totals while their history still exists
+        for rowid in rowids:
+            reverse_entry_totals(cursor, rowid)
+        # Delete history first
+        cursor.executemany("DELETE FROM assets_liabilities_history WHERE asset_liability_id = ?", [(rowid,) for rowid in rowids])
+        # Then delete the main entries
+        cursor.executemany("DELETE FROM entries WHERE id = ?", [(rowid,) for rowid in rowids])
+
+def update_entry(rowid, new_value, description, new_date):
+    update_entries([(rowid, new_value, description, new_date)])
+
+def update_entries(changes):
+    # Apply many edits in one transaction; each change is (rowid, new_value, description, new_date)
+    changes = [(rowid, new_value, description, str(new_date)) for rowid, new_value, description, new_date in changes]
+    if not changes:
+        return
+    with transaction() as cursor:
+        # Get the old values
+        rowids = list({change[0] for change in changes})
+        current = {}
+        for start in range(0, len(rowids), LOOKUP_CHUNK_SIZE):
+            chunk = rowids[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            cursor.execute(f"SELECT id, value, category FROM assets_liabilities WHERE id IN ({placeholders})", chunk)
+            current.update({rowid: (value, category) for rowid, value, category in cursor.fetchall()})
+
+        updates = []
+        history = []
+        totals = []
+        for rowid, new_value, description, new_date in changes:
+            old_value, category = current.get(rowid, (0, None))  # or handle as needed
+            diff = new_value - old_value
+            current[rowid] = (new_value, category)
+            updates.append((new_value, description, new_date, rowid))
+            history.append((rowid, new_date, old_value, new_value, diff, description))
+            totals.append((new_date, category, diff))
+
+        # Update the main table
+        cursor.executemany(
+            f"UPDATE entries SET value_cents = {cents_sql('?')}, description = ?, day = {day_number_sql('?')} WHERE id = ?",
+            updates
+        )
+
+        # Insert into history table
+        cursor.executemany(
+            "INSERT INTO assets_liabilities_history (asset_liability_id, date, old_value, new_value, difference, description) VALUES (?, ?, ?, ?, ?, ?)",
+            history
+        )
+        record_daily_changes(cursor, totals)
+
+def insert_goal(goal_type, goal_subcategory, goal_amount, progress):
+    with transaction() as cursor:
+        cursor.execute('''
+            INSERT INTO goals (goal_type, goal_subcategory, goal_amount, progress)
+            VALUES (?, ?, ?, ?)
+        ''', (goal_type, goal_subcategory, goal_amount, progress))
+        return cursor.lastrowid
+
+def remove_goal(goal_id):
+    with transaction() as cursor:
+        cursor.execute("DELETE FROM goals WHERE id = ?", (goal_id,))
+
+def rebuild_daily_totals(cursor):
+    # Regenerate the running totals from the full history table
+    cursor.execute("DELETE FROM daily_totals")
+    cursor.execute('''
+        INSERT INTO daily_totals (date, category, delta, running_total)
+        SELECT date, category, SUM(amount),
+               SUM(SUM(amount)) OVER (PARTITION BY category ORDER BY date)
+        FROM (
+            SELECT h.date, a.category, h.difference AS amount
+            FROM assets_liabilities_history h
+            JOIN assets_liabilities a ON h.asset_liability_id = a.id
+            UNION ALL
+            SELECT date, category, old_value
+            FROM (
+                SELECT h.date, a.category, h.old_value,
+                       ROW_NUMBER() OVER (PARTITION BY h.asset_liability_id ORDER BY h.id) AS position
+                FROM assets_liabilities_history h
+                JOIN assets_liabilities a ON h.asset_liability_id = a.id
+            )
+            WHERE position = 1 AND old_value IS NOT NULL
+        )
+        WHERE amount IS NOT NULL
+        GROUP BY date, category
+    ''')
+
+if __name__ == "__main__":
+    import argparse
 
-    conn = sqlite3.connect(db_path)
-    return conn
+    parser = argparse.ArgumentParser(description="Net worth database maintenance")
+    parser.add_argument("command", choices=["rebuild-totals", "rebuild-rollups", "rebuild-subcategory-totals", "vacuum", "legacy-dates"], help="maintenance task to run")
+    args = parser.parse_args()
 
+    if args.command == "rebuild-totals":
+        create_table()
+        with transaction() as cursor:
+            rebuild_daily_totals(cursor)
+        print("Daily running totals rebuilt from history.")
+    elif args.command == "rebuild-rollups":
+        create_table()
+        with transaction() as cursor:
+            rebuild_period_rollups(cursor)
+        print("Monthly and yearly rollups rebuilt from the entries.")
+    elif args.command == "rebuild-subcategory-totals":
+        create_table()
+        with transaction() as cursor:
+            rebuild_subcategory_daily_totals(cursor)
+        print("Per subcategory daily totals rebuilt from history.")
+    elif args.command == "vacuum":
+        create_table()
+        # Rewrites the file without free pages, e.g. to reclaim the space of the old entries table
+        get_db_connection().execute("VACUUM")
+        print("Database compacted.")
+    elif args.command == "legacy-dates":
+        create_table()
+        # Entries whose date SQLite cannot read, with the text they were saved with, to fix by hand
+        rows = get_db_connection().execute('''
+            SELECT l.entry_id, l.date, a.category, a.subcategory, a.description, a.value
+            FROM legacy_dates l
+            JOIN assets_liabilities a ON a.id = l.entry_id
+            ORDER BY l.entry_id
+        ''').fetchall()
+        for row in rows:
+            print(*row, sep="\t")
+        print(f"{len(rows)} entries with unreadable dates.")
@@ -0,0 +1,207 @@
+# Net worth calculations with no Streamlit, pandas or plotly dependency, so they can run in
+# batch jobs, benchmarks and profilers as well as behind the app's pages
+import re
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import itemgetter
+
+from db_utils import PERIOD_ROLLUPS, ENTRY_SELECT, EPOCH_JULIAN_DAY, iso_date, day_number_sql, cents_sql
+from aggregates import load_summary, top_subcategories, ASSETS, LIABILITIES, CASH_FLOW
+
+# Goal types offered in the app and the ledger category each one tracks (None for net worth)
+GOAL_CATEGORIES = {
+    "Asset": ASSETS,
+    "Liability": LIABILITIES,
+    "Cash Flow": CASH_FLOW,
+    "Net Worth": None,
+}
+
+# Columns the entries listing can be sorted by, and the stored column each one sorts on
+ENTRY_SORT_COLUMNS = {
+    "date": "e.day",
+    "subcategory": "s.name",
+    "value": "e.value_cents",
+}
+
+@dataclass
+class TimeSeries:
+    # Column-oriented series: one list of values per named column, aligned with dates
+    dates: list = field(default_factory=list)
+    columns: dict = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.dates)
+
+@dataclass
+class Goal:
+    id: int
+    goal_type: str
+    subcategory: str
+    amount: float
+    amount_needed: float
+    current: float = 0.0  # the subcategory's total, or the net worth for Net Worth goals
+
+def ledger_totals(conn):
+    # Count, sum, average, min and max per category and subcategory
+    return load_summary(conn)
+
+def net_worth_series(conn):
+    # Running totals per category plus net worth and cash flow, one point per day with a change
+    rows = conn.execute("SELECT date, category, running_total FROM daily_totals ORDER BY date").fetchall()
+    categories = sorted({category for _, category, _ in rows})
+    series = TimeSeries(columns={category: [] for category in categories})
+    # Categories keep their last running total on days they did not change
+    current = dict.fromkeys(categories, 0.0)
+    for day, day_rows in groupby(rows, key=itemgetter(0)):
+        for _, category, running_total in day_rows:
+            current[category] = running_total
+        series.dates.append(day)
+        for category in categories:
+            series.columns[category].append(current[category])
+
+    empty = [0.0] * len(series)
+    assets = series.columns.get(ASSETS, empty)
+    liabilities = series.columns.get(LIABILITIES, empty)
+    series.columns['Net Worth'] = [a - l for a, l in zip(assets, liabilities)]
+    series.columns['Cash Flow'] = list(series.columns.get(CASH_FLOW, empty))
+    return series
+
+def _pivot(rows):
+    # (key, column, value) rows -> TimeSeries with missing cells filled with zero
+    dates = sorted({key for key, _, _ in rows})
+    position = {key: index for index, key in enumerate(dates)}
+    columns = {name: [0.0] * len(dates) for name in sorted({column for _, column, _ in rows})}
+    for key, column, value in rows:
+        columns[column][position[key]] = value or 0.0
+    return TimeSeries(dates, columns)
+
+def period_trends(conn, period_format):
+    # Total value per period and category; period_format is a strftime pattern such as '%Y-%m'.
+    # Months and years come from the trigger-maintained rollups, other periods from the entries
+    rollups = {fmt: table for table, fmt in PERIOD_ROLLUPS.items()}
+    if period_format in rollups:
+        rows = conn.execute(f"SELECT period, category, SUM(total) FROM {rollups[period_format]} GROUP BY period, category").fetchall()
+    else:
+        rows = conn.execute(f'''
+            SELECT g.period, c.name, g.total_cents / 100.0
+            FROM (
+                SELECT strftime(?, day + {EPOCH_JULIAN_DAY}) AS period, category_id, SUM(value_cents) AS total_cents
+                FROM entries
+                GROUP BY period, category_id
+            ) g
+            JOIN categories c ON c.id = g.category_id
+        ''', (period_format,)).fetchall()
+    return _pivot(rows)
+
+def subcategory_trends(conn):
+    # Total value per entry date and subcategory. Grouped on the stored day numbers and ids; the
+    # few thousand distinct days and ids are turned into dates and names afterwards
+    names = dict(conn.execute("SELECT id, name FROM subcategories").fetchall())
+    rows = conn.execute(
+        "SELECT day, subcategory_id, SUM(value_cents) FROM entries WHERE day IS NOT NULL GROUP BY day, subcategory_id"
+    ).fetchall()
+    dates = {day: iso_date(day) for day in {row[0] for row in rows}}
+    return _pivot([(dates[day], names[subcategory_id], total / 100) for day, subcategory_id, total in rows])
+
+def top_n(conn, limit=5):
+    # Largest subcategories per category with their entry counts
+    return top_subcategories(conn, limit)
+
+def _amount_needed(category, amount, current):
+    if category == LIABILITIES:
+        return amount + current
+    return amount - current
+
+def goal_amount_needed(goal_type, subcategory, amount, summary):
+    # How far the ledger still is from a goal, given the current totals
+    category = GOAL_CATEGORIES[goal_type]
+    current = summary.net_worth if category is None else summary.subcategory(category, subcategory).total
+    return _amount_needed(category, amount, current)
+
+def goals_for_summary(conn, summary):
+    # Every goal measured against the totals of a ledger summary, such as one computed in memory
+    # by ledger.py or an as-of snapshot
+    result = []
+    for goal_id, goal_type, subcategory, amount in conn.execute(
+        "SELECT id, goal_type, goal_subcategory, goal_amount FROM goals ORDER BY id"
+    ):
+        category = GOAL_CATEGORIES.get(goal_type)
+        current = summary.net_worth if category is None else summary.subcategory(category, subcategory).total
+        result.append(Goal(goal_id, goal_type, subcategory, amount, _amount_needed(category, amount, current), current))
+    return result
+
+@dataclass(frozen=True)
+class EntrySearch:
+    # View/Edit filters on top of category and subcategory; fields left empty match everything
+    text: str = ""  # words the description must contain, each matched as a prefix
+    include_history: bool = False  # also match descriptions an entry had before it was edited
+    start: str = None  # ISO dates, both inclusive
+    end: str = None
+    min_value: float = None
+    max_value: float = None
+
+def fts_query(text):
+    # FTS5 query requiring every word of a search as a prefix, e.g. 'rent jan' -> '"rent"* "jan"*'.
+    # Only word characters are kept, so nothing typed can break the query syntax
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text or ""))
+
+def _entry_filter(category, subcategory=None, search=None):
+    # FROM and WHERE clauses (entries as e) and parameters for a category's entries matching the
+    # filters. A text search starts from the full-text matches, joined with CROSS JOIN so SQLite
+    # keeps that order: the work then grows with the number of matches, not with the ledger
+    source = "entries e"
+    where = ["e.category_id = (SELECT id FROM categories WHERE name = ?)"]
+    params = [category]
+    query = fts_query(search.text) if search is not None else ""
+    if query:
+        matches = "SELECT rowid AS id FROM entries_fts WHERE entries_fts MATCH ?"
+        params.insert(0, query)
+        if search.include_history:
+            # Checkpoints left by history compaction (archive.py) all share one description and
+            # are not earlier descriptions; the raw rows they replaced are no longer indexed
+            matches += '''
+                UNION SELECT asset_liability_id FROM assets_liabilities_history
+                WHERE id IN (SELECT rowid FROM history_fts WHERE history_fts MATCH ?) AND checkpoint = 0
+            '''
+            params.insert(0, query)
+        source = f"({matches}) m CROSS JOIN entries e ON e.id = m.id"
+    if subcategory is not None:
+        where.append("e.subcategory_id = (SELECT id FROM subcategories WHERE name = ?)")
+        params.append(subcategory)
+    if search is not None:
+        if search.start is not None:
+            where.append(f"e.day >= {day_number_sql('?')}")
+            params.append(str(search.start))
+        if search.end is not None:
+            where.append(f"e.day <= {day_number_sql('?')}")
+            params.append(str(search.end))
+        if search.min_value is not None:
+            where.append(f"e.value_cents >= {cents_sql('?')}")
+            params.append(search.min_value)
+        if search.max_value is not None:
+            where.append(f"e.value_cents <= {cents_sql('?')}")
+            params.append(search.max_value)
+    return source, " AND ".join(where), tuple(params)
+
+def count_entries(conn, category, subcategory=None, search=None):
+    source, where, params = _entry_filter(category, subcategory, search)
+    return conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where}", params).fetchone()[0]
+
+def entries_page(conn, category, subcategory=None, sort_column="date", descending=True, page=1, page_size=25, search=None):
+    # One page of a category's entries, optionally limited to one subcategory and to the entries
+    # matching a search. The page's ids are found on the indexes first, so rows skipped by the
+    # offset are never read in full
+    if sort_column not in ENTRY_SORT_COLUMNS:
+        raise ValueError(f"Cannot sort entries by {sort_column!r}")
+    direction = "DESC" if descending else "ASC"
+    order = f"{ENTRY_SORT_COLUMNS[sort_column]} {direction}, e.id {direction}"
+    source, where, params = _entry_filter(category, subcategory, search)
+    join = "JOIN subcategories s ON s.id = e.subcategory_id" if sort_column == "subcategory" else ""
+    return conn.execute(f'''
+        {ENTRY_SELECT}
+        WHERE e.id IN (SELECT e.id FROM {source} {join} WHERE {where} ORDER BY {order} LIMIT ? OFFSET ?)
+        ORDER BY {order}
+    ''', params + (page_size, (page - 1) * page_size)).fetchall()
+
+def recent_entries(conn, limit=10):
+    return conn.execute(f"{ENTRY_SELECT} ORDER BY e.day DESC LIMIT ?", (limit,)).fetchall()
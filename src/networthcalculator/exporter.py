@@ -0,0 +1,163 @@
+import csv
+import io
+import json
+import tempfile
+import zipfile
+from dataclasses import dataclass
+
+from db_utils import get_db_connection
+
+# Rows fetched from SQLite and handed to the writer at a time
+EXPORT_CHUNK_SIZE = 10000
+# Exports are built in memory up to this size and spill to a temporary file beyond it
+SPOOL_MAX_SIZE = 16 * 1024 * 1024  # 16 MiB
+
+# Tables that can be exported, in the order they are written
+EXPORT_TABLES = {
+    "entries": "assets_liabilities",
+    "history": "assets_liabilities_history",
+    "goals": "goals",
+}
+
+@dataclass
+class ExportFormat:
+    label: str
+    extension: str
+    mime: str
+
+EXPORT_FORMATS = {
+    "csv": ExportFormat("CSV", "csv", "text/csv"),
+    "jsonl": ExportFormat("JSON Lines", "jsonl", "application/x-ndjson"),
+    "parquet": ExportFormat("Parquet", "parquet", "application/vnd.apache.parquet"),
+    "xlsx": ExportFormat("Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+@dataclass
+class ExportResult:
+    buffer: object  # binary file object positioned at the start
+    file_name: str
+    mime: str
+    rows: int
+
+def iter_table_chunks(conn, table, chunk_size=EXPORT_CHUNK_SIZE):
+    # Yield a table's rows a chunk at a time without ever loading the whole table
+    # Every exported table has an id; views such as assets_liabilities have no rowid
+    cursor = conn.execute(f"SELECT * FROM {table} ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield rows
+
+def table_columns(conn, table):
+    # (name, declared type) for each column of a table. Computed columns of a view have no
+    # declared type, so they take the storage class of their first value instead
+    columns = []
+    for row in conn.execute(f"PRAGMA table_info({table})").fetchall():
+        name, declared = row[1], row[2].upper()
+        if not declared:
+            found = conn.execute(f'SELECT typeof("{name}") FROM {table} WHERE "{name}" IS NOT NULL LIMIT 1').fetchone()
+            declared = found[0].upper() if found else ""
+        columns.append((name, declared))
+    return columns
+
+def _write_csv(conn, table, output):
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='')
+    writer = csv.writer(text)
+    writer.writerow([name for name, _ in table_columns(conn, table)])
+    rows = 0
+    for chunk in iter_table_chunks(conn, table):
+        writer.writerows(chunk)
+        rows += len(chunk)
+    text.flush()
+    text.detach()
+    return rows
+
+def _write_jsonl(conn, table, output):
+    text = io.TextIOWrapper(output, encoding='utf-8', newline='\n')
+    names = [name for name, _ in table_columns(conn, table)]
+    rows = 0
+    for chunk in iter_table_chunks(conn, table):
+        text.writelines(json.dumps(dict(zip(names, row))) + "\n" for row in chunk)
+        rows += len(chunk)
+    text.flush()
+    text.detach()
+    return rows
+
+def _arrow_schema(columns):
+    import pyarrow as pa
+
+    types = {"INTEGER": pa.int64(), "REAL": pa.float64()}
+    return pa.schema([(name, types.get(declared, pa.string())) for name, declared in columns])
+
+def _write_parquet(conn, table, output):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs the 'pyarrow' package (pip install pyarrow)") from None
+
+    columns = table_columns(conn, table)
+    schema = _arrow_schema(columns)
+    rows = 0
+    # One row group per chunk keeps memory flat however large the table is
+    with pq.ParquetWriter(output, schema) as writer:
+        for chunk in iter_table_chunks(conn, table):
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+def _write_xlsx(conn, tables, output):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ImportError("Excel export needs the 'openpyxl' package (pip install openpyxl)") from None
+
+    # Write-only workbooks stream rows to disk instead of keeping every cell in memory
+    workbook = Workbook(write_only=True)
+    rows = 0
+    for name, table in tables:
+        sheet = workbook.create_sheet(title=name)
+        sheet.append([column for column, _ in table_columns(conn, table)])
+        for chunk in iter_table_chunks(conn, table):
+            for row in chunk:
+                sheet.append(row)
+            rows += len(chunk)
+    workbook.save(output)
+    return rows
+
+TABLE_WRITERS = {
+    "csv": _write_csv,
+    "jsonl": _write_jsonl,
+    "parquet": _write_parquet,
+}
+
+def export_tables(names, file_format, conn=None, base_name="net_worth_data"):
+    # Export the named tables (keys of EXPORT_TABLES) as one file, or a zip with one file per table
+    export_format = EXPORT_FORMATS[file_format]
+    conn = conn or get_db_connection()
+    tables = [(name, EXPORT_TABLES[name]) for name in names]
+    if not tables:
+        raise ValueError("Choose at least one table to export")
+
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    try:
+        if file_format == "xlsx":
+            rows = _write_xlsx(conn, tables, buffer)
+            file_name, mime = f"{base_name}.xlsx", export_format.mime
+        elif len(tables) == 1:
+            rows = TABLE_WRITERS[file_format](conn, tables[0][1], buffer)
+            file_name, mime = f"{base_name}.{export_format.extension}", export_format.mime
+        else:
+            rows = 0
+            with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for name, table in tables:
+                    with archive.open(f"{name}.{export_format.extension}", "w") as member:
+                        rows += TABLE_WRITERS[file_format](conn, table, member)
+            file_name, mime = f"{base_name}.zip", "application/zip"
+    except BaseException:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return ExportResult(buffer, file_name, mime, rows)
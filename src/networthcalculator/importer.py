@@ -0,0 +1,218 @@
+import csv
+import io
+import json
+import math
+import os
+from dataclasses import dataclass, field
+from datetime import date
+
+from db_utils import transaction, record_daily_changes, insert_entry_rows, deferred_search_index, ASSET_CATEGORIES, LIABILITY_CATEGORIES, CASHFLOW_CATEGORIES
+from aggregates import ASSETS, LIABILITIES, CASH_FLOW
+from writer import write_alone
+
+# Allowed subcategories for each category
+CATEGORY_SUBCATEGORIES = {
+    ASSETS: ASSET_CATEGORIES,
+    LIABILITIES: LIABILITY_CATEGORIES,
+    CASH_FLOW: CASHFLOW_CATEGORIES,
+}
+# Case-insensitive lookup of the canonical subcategory names
+_SUBCATEGORY_LOOKUP = {
+    category: {name.lower(): name for name in names}
+    for category, names in CATEGORY_SUBCATEGORIES.items()
+}
+# Rows written per transaction
+IMPORT_CHUNK_SIZE = 5000
+# Only the first rejected rows are reported back in detail
+MAX_REPORTED_ERRORS = 100
+# Characters skipped between records in a JSON array or JSON Lines file
+JSON_SEPARATORS = " \t\r\n,"
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: int = 0
+    errors: list = field(default_factory=list)  # (row number, message)
+
+    def reject(self, row_number, message):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((row_number, message))
+
+class ParseError(ValueError):
+    # The file itself cannot be read on from a line on, as opposed to a record failing validation
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+def iter_csv_records(stream):
+    # Rows of a CSV file with a header line, read one at a time. Lines are counted as they are
+    # handed to the reader, whose own line_num can lag behind the line an error is on
+    lines_read = 0
+
+    def counted_lines():
+        nonlocal lines_read
+        for line in stream:
+            lines_read += 1
+            yield line
+
+    try:
+        yield from csv.DictReader(counted_lines())
+    except csv.Error as error:
+        raise ParseError(lines_read, error) from None
+
+def iter_json_records(stream, read_size=1 << 16):
+    # Records of a JSON array or a JSON Lines file, decoded incrementally so the file is never held in memory
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    lines_read = 0  # lines of the file before the buffer
+    started = False
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in JSON_SEPARATORS:
+            position += 1
+        if position < len(buffer):
+            if not started:
+                started = True
+                if buffer[position] == '[':
+                    position += 1
+                    continue
+            if buffer[position] == ']':
+                return
+            try:
+                record, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                # Most likely a record cut off at the end of the buffer, read more and try again
+                if eof:
+                    raise ParseError(lines_read + buffer.count('\n', 0, error.pos) + 1, error.msg) from None
+            else:
+                yield record
+                continue
+        if eof:
+            return
+        chunk = stream.read(read_size)
+        lines_read += buffer.count('\n', 0, position)
+        buffer = buffer[position:] + chunk
+        position = 0
+        eof = not chunk
+
+def validate_record(record):
+    # Turn one imported record into an assets_liabilities row, raising ValueError if it is not valid
+    if not isinstance(record, dict):
+        raise ValueError("record is not an object")
+
+    category = str(record.get('category') or '').strip().lower()
+    if category not in CATEGORY_SUBCATEGORIES:
+        raise ValueError(f"unknown category {record.get('category')!r}")
+
+    subcategory = _SUBCATEGORY_LOOKUP[category].get(str(record.get('subcategory') or '').strip().lower())
+    if subcategory is None:
+        raise ValueError(f"unknown {category} subcategory {record.get('subcategory')!r}")
+
+    try:
+        entry_date = date.fromisoformat(str(record.get('date') or '').strip()[:10]).isoformat()
+    except ValueError:
+        raise ValueError(f"invalid date {record.get('date')!r}") from None
+
+    try:
+        value = float(record.get('value'))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid value {record.get('value')!r}") from None
+    if not math.isfinite(value):
+        raise ValueError(f"value must be a finite number, got {value}")
+    if value < 0:
+        raise ValueError(f"value must not be negative, got {value}")
+
+    description = record.get('description')
+    description = '' if description is None else str(description)
+    return entry_date, category, subcategory, description, value
+
+def _write_chunk(rows):
+    with transaction() as cursor:
+        # Hand out ids up front so the history rows can be written with executemany as well
+        cursor.execute('''
+            SELECT MAX(
+                COALESCE((SELECT MAX(id) FROM entries), 0),
+                COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'entries'), 0)
+            )
+        ''')
+        first_id = cursor.fetchone()[0] + 1
+        ids = range(first_id, first_id + len(rows))
+
+        with deferred_search_index(cursor, ids.start, ids.stop - 1):
+            insert_entry_rows(cursor, [(entry_id,) + row for entry_id, row in zip(ids, rows)])
+            cursor.executemany(
+                "INSERT INTO assets_liabilities_history (asset_liability_id, date, old_value, new_value, difference, description) VALUES (?, ?, ?, ?, ?, ?)",
+                [(entry_id, entry_date, 0, value, value, description)
+                 for entry_id, (entry_date, _, _, description, value) in zip(ids, rows)]
+            )
+
+        record_daily_changes(cursor, [(entry_date, category, value) for entry_date, category, _, _, value in rows])
+
+def import_records(records, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    # Validate and write records in chunked transactions; progress(result) is called after each chunk.
+    # Chunks go through the writer queue, each in a transaction of its own, so an import and the
+    # pages' saves take turns at the write lock instead of failing on a locked database
+    result = ImportResult()
+    rows = []
+    for row_number, record in enumerate(records, start=1):
+        try:
+            rows.append(validate_record(record))
+        except ValueError as error:
+            result.reject(row_number, str(error))
+            continue
+        if len(rows) >= chunk_size:
+            write_alone(_write_chunk, rows)
+            result.imported += len(rows)
+            rows = []
+            if progress:
+                progress(result)
+    if rows:
+        write_alone(_write_chunk, rows)
+        result.imported += len(rows)
+    if progress:
+        progress(result)
+    return result
+
+def detect_format(name):
+    extension = os.path.splitext(name)[1].lower()
+    if extension == '.csv':
+        return 'csv'
+    if extension in ('.json', '.jsonl', '.ndjson'):
+        return 'json'
+    raise ValueError(f"Unsupported file type {extension!r}, expected CSV or JSON")
+
+def import_file(source, file_format=None, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    # source is a path or a binary file object (such as a Streamlit upload)
+    if isinstance(source, (str, os.PathLike)):
+        file_format = file_format or detect_format(os.fspath(source))
+        with open(source, 'rb') as binary:
+            return import_file(binary, file_format, chunk_size, progress)
+
+    file_format = file_format or detect_format(getattr(source, 'name', ''))
+    stream = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    try:
+        records = iter_csv_records(stream) if file_format == 'csv' else iter_json_records(stream)
+        return import_records(records, chunk_size, progress)
+    finally:
+        # Leave the caller's file object open
+        stream.detach()
+
+if __name__ == "__main__":
+    import argparse
+    from db_utils import create_table
+
+    parser = argparse.ArgumentParser(description="Import a CSV or JSON ledger into the net worth database")
+    parser.add_argument("path", help="CSV, JSON array or JSON Lines file with date, category, subcategory, description and value fields")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="rows written per transaction")
+    args = parser.parse_args()
+
+    create_table()
+    try:
+        result = import_file(args.path, chunk_size=args.chunk_size)
+    except ValueError as error:
+        parser.exit(1, f"Import stopped: {error}\n")
+    print(f"Imported {result.imported} rows, rejected {result.rejected}.")
+    for row_number, message in result.errors:
+        print(f"  row {row_number}: {message}")
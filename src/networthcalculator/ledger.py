@@ -0,0 +1,228 @@
+# The ledger held in memory as parallel NumPy arrays: category and subcategory as small integer
+# codes, dates as day numbers (as stored in the entries table) and values as floats, 23 bytes an
+# entry instead of a DataFrame row of Python strings. One copy is shared by every session in the
+# process; it is loaded once and afterwards only re-reads new entries and the ones the
+# entry_changes log says were edited or deleted. The totals, trends, rankings and counts the
+# pages show are computed from it with vectorised NumPy instead of per-page queries and DataFrames
+import threading
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from aggregates import CATEGORIES, LedgerSummary, Stats, TopSubcategory
+from db_utils import data_version, ASSET_CATEGORIES, LIABILITY_CATEGORIES, CASHFLOW_CATEGORIES, LOOKUP_CHUNK_SIZE
+from engine import TimeSeries
+
+# Names by code. Codes follow the app's own lists; names only found in older data get the next
+# free code when they are first read, so existing codes never change
+CATEGORY_NAMES = list(CATEGORIES)
+SUBCATEGORY_NAMES = list(dict.fromkeys(ASSET_CATEGORIES + LIABILITY_CATEGORIES + CASHFLOW_CATEGORIES))
+_category_codes = {name: code for code, name in enumerate(CATEGORY_NAMES)}
+_subcategory_codes = {name: code for code, name in enumerate(SUBCATEGORY_NAMES)}
+_codes_lock = threading.Lock()
+
+# Day number stored for dates SQLite cannot read; such entries count towards totals but not trends
+INVALID_DAY = np.iinfo(np.int32).min
+
+# Trend periods the ledger can group by, as the strftime pattern used elsewhere -> datetime64 unit
+PERIOD_UNITS = {
+    "%Y-%m-%d": "D",
+    "%Y-%m": "M",
+    "%Y": "Y",
+}
+
+def _codes(names, codes, table):
+    # Integer codes for a column of names, handing out new codes for names not seen before
+    try:
+        return [codes[name] for name in names]
+    except KeyError:
+        with _codes_lock:
+            for name in dict.fromkeys(names):
+                if name not in codes:
+                    codes[name] = len(table)
+                    table.append(name)
+        return [codes[name] for name in names]
+
+@dataclass(frozen=True)
+class Ledger:
+    ids: np.ndarray  # int64, ascending
+    categories: np.ndarray  # int8 codes into CATEGORY_NAMES
+    subcategories: np.ndarray  # int16 codes into SUBCATEGORY_NAMES
+    days: np.ndarray  # int32 days since 1970-01-01
+    values: np.ndarray  # float64
+    source: str = ""  # database file the arrays were read from
+    last_change: int = 0  # entry_changes.seq the arrays are current up to
+    version: int = -1  # db_utils.data_version() when they were last brought up to date
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def nbytes(self):
+        return self.ids.nbytes + self.categories.nbytes + self.subcategories.nbytes + self.days.nbytes + self.values.nbytes
+
+    def _code(self, category, subcategory=None):
+        # (category code, subcategory code) of names, None where a name does not occur in the data
+        return _category_codes.get(category), None if subcategory is None else _subcategory_codes.get(subcategory)
+
+    def summary(self):
+        # Count, sum, min and max per category and subcategory, like aggregates.load_summary
+        summary = LedgerSummary()
+        if not len(self):
+            return summary
+        width = len(SUBCATEGORY_NAMES)
+        keys = self.categories.astype(np.int64) * width + self.subcategories
+        order = np.argsort(keys, kind='stable')
+        keys, values = keys[order], self.values[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        counts = np.diff(np.r_[starts, len(keys)])
+        totals = np.add.reduceat(values, starts)
+        minimums = np.minimum.reduceat(values, starts)
+        maximums = np.maximum.reduceat(values, starts)
+        for key, count, total, minimum, maximum in zip(
+            keys[starts].tolist(), counts.tolist(), totals.tolist(), minimums.tolist(), maximums.tolist()
+        ):
+            category = CATEGORY_NAMES[key // width]
+            stats = Stats(count, total, minimum, maximum)
+            summary.subcategories[(category, SUBCATEGORY_NAMES[key % width])] = stats
+            summary.categories.setdefault(category, Stats()).merge(stats)
+        return summary
+
+    def top_subcategories(self, limit=5):
+        # Largest subcategories of every category with their entry counts, like aggregates.top_subcategories
+        top = {category: [] for category in CATEGORIES}
+        ranked = sorted(self.summary().subcategories.items(), key=lambda item: (item[0][0], -item[1].total))
+        for (category, subcategory), stats in ranked:
+            entries = top.setdefault(category, [])
+            if len(entries) < limit:
+                entries.append(TopSubcategory(subcategory, stats.total, stats.count, len(entries) + 1))
+        return top
+
+    def count(self, category, subcategory=None):
+        category_code, subcategory_code = self._code(category, subcategory)
+        if category_code is None or (subcategory is not None and subcategory_code is None):
+            return 0
+        mask = self.categories == category_code
+        if subcategory is not None:
+            mask &= self.subcategories == subcategory_code
+        return int(np.count_nonzero(mask))
+
+    def _pivot(self, keys, codes, names, values):
+        # TimeSeries of the values summed per key and code, one column per code that occurs,
+        # named and ordered like engine._pivot
+        dates, position = np.unique(keys, return_inverse=True)
+        width = len(names)
+        cells = position.astype(np.int64) * width + codes
+        totals = np.bincount(cells, weights=values, minlength=len(dates) * width).reshape(len(dates), width)
+        present = np.flatnonzero(np.bincount(codes, minlength=width))
+        columns = {names[code]: totals[:, code] for code in sorted(present, key=lambda code: names[code])}
+        return TimeSeries(dates, columns)
+
+    def period_trends(self, period_format):
+        # Total value per period and category, for the periods in PERIOD_UNITS
+        if period_format not in PERIOD_UNITS:
+            raise ValueError(f"Cannot group the ledger by {period_format!r}")
+        valid = self.days != INVALID_DAY
+        periods = self.days[valid].astype('datetime64[D]').astype(f'datetime64[{PERIOD_UNITS[period_format]}]')
+        return self._pivot(periods, self.categories[valid], CATEGORY_NAMES, self.values[valid])
+
+    def subcategory_trends(self):
+        # Total value per entry date and subcategory
+        valid = self.days != INVALID_DAY
+        return self._pivot(self.days[valid].astype('datetime64[D]'), self.subcategories[valid], SUBCATEGORY_NAMES, self.values[valid])
+
+def _translation(conn, table, codes, names):
+    # Array mapping the ids of a lookup table (categories or subcategories) to the ledger's codes
+    rows = conn.execute(f"SELECT id, name FROM {table}").fetchall()
+    translation = np.zeros(max((row[0] for row in rows), default=0) + 1, dtype=np.int16)
+    if rows:
+        ids, table_names = zip(*rows)
+        translation[list(ids)] = _codes(table_names, codes, names)
+    return translation
+
+def _read(conn, where="1", params=()):
+    # Arrays for the entries matching a WHERE clause on the entries table, in id order. Day numbers
+    # are stored as such and the ids of the lookup tables only need mapping to the ledger's codes
+    rows = conn.execute(f'''
+        SELECT id, category_id, subcategory_id, COALESCE(day, {INVALID_DAY}), value_cents
+        FROM entries
+        WHERE {where}
+        ORDER BY id
+    ''', params).fetchall()
+    ids, categories, subcategories, days, cents = zip(*rows) if rows else ((),) * 5
+    category_codes = _translation(conn, "categories", _category_codes, CATEGORY_NAMES)
+    subcategory_codes = _translation(conn, "subcategories", _subcategory_codes, SUBCATEGORY_NAMES)
+    return (
+        np.array(ids, dtype=np.int64),
+        category_codes[np.array(categories, dtype=np.int64)].astype(np.int8),
+        subcategory_codes[np.array(subcategories, dtype=np.int64)],
+        np.array(days, dtype=np.int32),
+        np.array(cents, dtype=np.float64) / 100,
+    )
+
+def _source(conn):
+    return conn.execute("PRAGMA database_list").fetchone()[2]
+
+def _last_change(conn):
+    return conn.execute("SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'entry_changes'), 0)").fetchone()[0]
+
+def load(conn):
+    # The whole ledger read into arrays; the data version is taken first, so a write that lands
+    # while reading still triggers a refresh
+    version = data_version()
+    last_change = _last_change(conn)
+    return Ledger(*_read(conn), source=_source(conn), last_change=last_change, version=version)
+
+def refresh(ledger, conn):
+    # A copy of the ledger brought up to date: entries logged in entry_changes since it was read
+    # are read again (or dropped if deleted) and entries past its last id appended. Reading a row
+    # again is harmless, so writes that race with the refresh are simply picked up next time
+    version = data_version()
+    if _source(conn) != ledger.source:
+        return load(conn)
+    last_change = _last_change(conn)
+    first_kept = conn.execute("SELECT MIN(seq) FROM entry_changes").fetchone()[0]
+    if first_kept is not None and first_kept > ledger.last_change + 1:
+        # The log has been trimmed past the changes this copy still needs
+        return load(conn)
+
+    changed = np.array(sorted({entry_id for entry_id, in conn.execute(
+        "SELECT entry_id FROM entry_changes WHERE seq > ? AND seq <= ?", (ledger.last_change, last_change)
+    )}), dtype=np.int64)
+    last_id = int(ledger.ids[-1]) if len(ledger) else 0
+    parts = []
+    if len(changed):
+        keep = ~np.isin(ledger.ids, changed)
+        parts.append(tuple(array[keep] for array in (ledger.ids, ledger.categories, ledger.subcategories, ledger.days, ledger.values)))
+        # Changed entries past last_id are read below with the new ones
+        reread = changed[changed <= last_id].tolist()
+        for start in range(0, len(reread), LOOKUP_CHUNK_SIZE):
+            chunk = reread[start:start + LOOKUP_CHUNK_SIZE]
+            parts.append(_read(conn, f"id IN ({', '.join('?' * len(chunk))})", chunk))
+    else:
+        parts.append((ledger.ids, ledger.categories, ledger.subcategories, ledger.days, ledger.values))
+    new = _read(conn, "id > ?", (last_id,))
+    if len(new[0]):
+        parts.append(new)
+
+    if len(parts) == 1 and not len(changed):
+        return replace(ledger, last_change=last_change, version=version)
+    arrays = [np.concatenate(column) for column in zip(*parts)]
+    if len(changed):
+        order = np.argsort(arrays[0], kind='stable')
+        arrays = [array[order] for array in arrays]
+    return Ledger(*arrays, source=ledger.source, last_change=last_change, version=version)
+
+_shared = None
+_shared_lock = threading.Lock()
+
+def shared(conn):
+    # The process-wide ledger, brought up to date first if anything was written since it was read.
+    # Sessions share the arrays, so treat them as read-only
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = load(conn)
+        elif _shared.version != data_version():
+            _shared = refresh(_shared, conn)
+        return _shared
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+# Profiling is opt-in: set NETWORTH_PROFILE=1 to have it switched on when the app starts
+ENABLED_BY_DEFAULT = os.environ.get("NETWORTH_PROFILE", "").lower() in ("1", "true", "yes", "on")
+# Session state key of the sidebar toggle that switches profiling on and off
+TOGGLE_KEY = "profile_reruns"
+# Every profiled rerun is appended to this log as one JSON line
+LOG_PATH = os.environ.get("NETWORTH_PROFILE_LOG", os.path.join(os.path.dirname(__file__), 'data', 'profile.log'))
+LOG_MAX_BYTES = 5 * 1024 * 1024  # 5 MiB
+LOG_BACKUP_COUNT = 3
+# Statements are shown and logged up to this many characters
+SQL_PREVIEW_LENGTH = 120
+
+@dataclass
+class Timing:
+    kind: str  # "query" or "block"
+    name: str
+    depth: int = 0
+    seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+
+    def measure(self, value):
+        # Record the size of a block's result, e.g. a DataFrame or a list of rows
+        from cache import estimate_size
+
+        if hasattr(value, '__len__'):
+            self.rows = len(value)
+        self.bytes = estimate_size(value)
+
+@dataclass
+class ProfileRun:
+    # Everything timed during one rerun of one page
+    page: str
+    started: float = field(default_factory=time.perf_counter)
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat(timespec="seconds"))
+    seconds: float = 0.0
+    timings: list = field(default_factory=list)
+    depth: int = 0
+
+    def add(self, kind, name):
+        timing = Timing(kind, name, self.depth)
+        self.timings.append(timing)
+        return timing
+
+    def queries(self):
+        return [timing for timing in self.timings if timing.kind == "query"]
+
+    def blocks(self):
+        return [timing for timing in self.timings if timing.kind == "block"]
+
+    @property
+    def sql_seconds(self):
+        return sum(timing.seconds for timing in self.queries())
+
+    def to_dict(self):
+        return {
+            "timestamp": self.timestamp,
+            "page": self.page,
+            "seconds": self.seconds,
+            "sql_seconds": self.sql_seconds,
+            "queries": len(self.queries()),
+            "rows": sum(timing.rows for timing in self.queries()),
+            "bytes": sum(timing.bytes for timing in self.queries()),
+            "timings": [vars(timing) for timing in self.timings],
+        }
+
+_local = threading.local()
+
+def active_run():
+    # The run being profiled on this thread (each Streamlit rerun has its own thread), if any
+    return getattr(_local, 'run', None)
+
+def start_run(page):
+    run = ProfileRun(page)
+    _local.run = run
+    return run
+
+def finish_run(run):
+    run.seconds = time.perf_counter() - run.started
+    _local.run = None
+    log_run(run)
+    return run
+
+@contextmanager
+def block(name):
+    # Time a compute or render block; a no-op unless a run is being profiled
+    run = active_run()
+    if run is None:
+        yield Timing("block", name)
+        return
+    timing = run.add("block", name)
+    run.depth += 1
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.seconds = time.perf_counter() - start
+        run.depth -= 1
+
+def _row_size(row):
+    # Approximate bytes a fetched row carries: text and blobs by length, numbers as 8 bytes
+    return sum(len(value) if isinstance(value, (str, bytes)) else 0 if value is None else 8 for value in row)
+
+class ProfiledCursor(sqlite3.Cursor):
+    # Cursor that adds its statements' time, rows and bytes (fetching included) to the active run
+    timing = None
+
+    def _start(self, sql):
+        run = active_run()
+        self.timing = run.add("query", " ".join(sql.split())[:SQL_PREVIEW_LENGTH]) if run else None
+        return time.perf_counter()
+
+    def _finish(self, start, rows=()):
+        if self.timing is not None:
+            self.timing.seconds += time.perf_counter() - start
+            self.timing.rows += len(rows)
+            self.timing.bytes += sum(_row_size(row) for row in rows)
+
+    def execute(self, sql, parameters=()):
+        start = self._start(sql)
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._finish(start)
+            if self.timing is not None and self.rowcount > 0:
+                self.timing.rows += self.rowcount
+
+    def executemany(self, sql, parameters):
+        start = self._start(sql)
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            self._finish(start)
+            if self.timing is not None and self.rowcount > 0:
+                self.timing.rows += self.rowcount
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._finish(start, () if row is None else (row,))
+        return row
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._finish(start, rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._finish(start, rows)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        row = super().__next__()
+        self._finish(start, (row,))
+        return row
+
+_logger = None
+_logger_lock = threading.Lock()
+
+def _get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+            handler = RotatingFileHandler(LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("networthcalculator.profiling")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+    return _logger
+
+def log_run(run):
+    _get_logger().info(json.dumps(run.to_dict()))
@@ -0,0 +1,197 @@
+# Monte Carlo projection of when a goal will be reached. The balance a goal tracks (one
+# subcategory's, or net worth) is taken month by month from the history, and its monthly change
+# is fitted as
+#   change = contribution + return * balance + noise
+# with the noise split into a part that grows with the balance (return volatility) and a constant
+# part (contribution volatility). Thousands of paths are then simulated together, one vectorised
+# NumPy step per month, and summarised as percentile bands and the spread of the month in which
+# each path first reaches the goal
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+from aggregates import ASSETS, LIABILITIES
+from engine import GOAL_CATEGORIES
+from trends import MONTH, load_deltas
+
+# Simulated paths and months projected (30 years)
+PATHS = 10_000
+HORIZON_MONTHS = 360
+# Percentiles drawn as bands and reported for the reach date
+PERCENTILES = (10, 25, 50, 75, 90)
+# Only the most recent months of history inform the fit
+FIT_MONTHS = 120
+# With fewer months than this, the balance is projected from its average change alone
+MIN_FIT_MONTHS = 6
+# Bounds on the fitted monthly return and its volatility, so a short or erratic history cannot
+# project runaway growth
+MAX_MONTHLY_RETURN = 0.05
+MAX_RETURN_SD = 0.2
+# Fixed seed: a projection only changes when the data does
+SEED = 0
+
+@dataclass(frozen=True)
+class GrowthModel:
+    contribution: float = 0.0  # mean monthly change not explained by the balance (€)
+    contribution_sd: float = 0.0
+    monthly_return: float = 0.0  # mean change per € of balance and month
+    return_sd: float = 0.0
+    months: int = 0  # months of history fitted
+
+@dataclass(frozen=True)
+class GoalProjection:
+    goal_id: int
+    model: GrowthModel
+    target: float  # balance at which the goal is reached
+    history_dates: np.ndarray  # datetime64[D], first day of each month with history
+    history: np.ndarray  # balance at the end of that month
+    dates: np.ndarray  # datetime64[D], today followed by the first day of each projected month
+    bands: dict  # percentile -> balance on each of dates
+    reached: np.ndarray  # share of paths that have reached the goal by each of dates
+    reach_dates: dict  # percentile -> first day of the month it is reached by then, or None
+
+    @property
+    def probability(self):
+        # Share of paths reaching the goal within the horizon
+        return float(self.reached[-1])
+
+def goal_balances(deltas, category, subcategory):
+    # (month start dates, balance at the end of each month) of what a goal tracks, from the
+    # first month with a change to the last: a subcategory's balance, or net worth when category
+    # is None
+    series = deltas.balances(MONTH)
+    if not len(series):
+        return np.array([], dtype='datetime64[D]'), np.array([])
+    if category is not None:
+        if (category, subcategory) not in deltas.keys:
+            return np.array([], dtype='datetime64[D]'), np.array([])
+        return series.dates, series.columns[deltas.labels[deltas.keys.index((category, subcategory))]]
+    signs = {ASSETS: 1.0, LIABILITIES: -1.0}
+    balances = np.zeros(len(series))
+    for (key_category, _), label in zip(deltas.keys, deltas.labels):
+        if key_category in signs:
+            balances += signs[key_category] * series.columns[label]
+    return series.dates, balances
+
+def fit_growth(balances, months=FIT_MONTHS):
+    # Least-squares fit of change = contribution + return * balance over the last `months` month
+    # ends, then of the squared residuals as contribution_sd**2 + (return_sd * balance)**2
+    balances = np.asarray(balances, dtype=np.float64)[-months - 1:]
+    start, changes = balances[:-1], np.diff(balances)
+    if not len(changes):
+        return GrowthModel()
+    if len(changes) < MIN_FIT_MONTHS or np.ptp(start) == 0:
+        return GrowthModel(float(changes.mean()), float(changes.std()), months=len(changes))
+
+    design = np.column_stack([np.ones_like(start), start])
+    (contribution, monthly_return), *_ = np.linalg.lstsq(design, changes, rcond=None)
+    if abs(monthly_return) > MAX_MONTHLY_RETURN:
+        monthly_return = np.clip(monthly_return, -MAX_MONTHLY_RETURN, MAX_MONTHLY_RETURN)
+        contribution = (changes - monthly_return * start).mean()
+    squared = (changes - contribution - monthly_return * start) ** 2
+
+    (contribution_var, return_var), *_ = np.linalg.lstsq(np.column_stack([np.ones_like(start), start ** 2]), squared, rcond=None)
+    if return_var < 0:
+        contribution_var, return_var = squared.mean(), 0.0
+    elif contribution_var < 0:
+        contribution_var, return_var = 0.0, (squared * start ** 2).sum() / (start ** 4).sum()
+    return GrowthModel(
+        float(contribution), float(np.sqrt(contribution_var)),
+        float(monthly_return), float(min(np.sqrt(return_var), MAX_RETURN_SD)),
+        len(changes),
+    )
+
+@lru_cache(maxsize=1)
+def standard_shocks(months=HORIZON_MONTHS, paths=PATHS, seed=SEED):
+    # (months, paths) float32 standard normals, shared read-only by every goal's simulation: they
+    # do not depend on the goal, so drawing them once per process takes the bulk of the work out
+    # of each projection, and goals are compared on the same random paths. Only half the paths
+    # are drawn; the other half take the same shocks negated (antithetic pairs), which keeps the
+    # paths' average on the fitted trend
+    half = np.random.default_rng(seed).standard_normal((months, (paths + 1) // 2), dtype=np.float32)
+    shocks = np.concatenate([half, -half], axis=1)[:, :paths]
+    shocks.flags.writeable = False
+    return shocks
+
+def simulate(model, start, months=HORIZON_MONTHS, paths=PATHS, seed=SEED, floor=None):
+    # (months + 1, paths) float32 balances, row 0 holding the start. The return and contribution
+    # shocks of a month are independent normals, so their sum is one normal with the combined
+    # variance. Each month is a handful of in-place array operations across all paths, on float64
+    # balances (float32 would round small contributions away on large balances) stored as float32.
+    # With a floor, balances stop there instead of going below it (a debt paid off stays at 0)
+    shocks = standard_shocks(months, paths, seed)
+    balances = np.empty((months + 1, paths), dtype=np.float32)
+    current = np.full(paths, float(start))
+    shock = np.empty(paths)
+    balances[0] = current
+    growth = 1.0 + model.monthly_return
+    contribution_var = model.contribution_sd ** 2
+    return_var = model.return_sd ** 2
+    for month in range(months):
+        # shock = sqrt(contribution_var + return_var * current**2) * standard normal
+        np.multiply(current, current, out=shock)
+        shock *= return_var
+        shock += contribution_var
+        np.sqrt(shock, out=shock)
+        shock *= shocks[month]
+        current *= growth
+        current += model.contribution
+        current += shock
+        if floor is not None:
+            np.maximum(current, floor, out=current)
+        balances[month + 1] = current
+    return balances
+
+def _rank(percentile, paths):
+    # Position of a percentile among sorted paths (nearest rank)
+    return max(int(np.ceil(percentile / 100 * paths)) - 1, 0)
+
+def _first_days(today, months):
+    # today, then the first day of each of the following months
+    this_month = np.datetime64(today, 'M')
+    following = (this_month + np.arange(1, months + 1)).astype('datetime64[D]')
+    return np.concatenate([[np.datetime64(today, 'D')], following])
+
+def project(goal, history_dates, history, today=None, months=HORIZON_MONTHS, paths=PATHS, seed=SEED):
+    # Projection of a goal (an engine.Goal) from the monthly history of the balance it tracks.
+    # The paths start from the goal's current balance; history after this month is left out of
+    # the fit, as it has not happened yet
+    today = today or date.today()
+    past = history_dates <= np.datetime64(today, 'D')
+    history_dates, history = history_dates[past], np.asarray(history)[past]
+    model = fit_growth(history)
+    # Reached once the balance gets to the goal's amount: up to it for assets, cash flow and net
+    # worth, down to it for liabilities, which cannot be paid off beyond 0
+    target = goal.amount
+    if GOAL_CATEGORIES.get(goal.goal_type) == LIABILITIES:
+        balances = simulate(model, goal.current, months, paths, seed, floor=0.0)
+        reached = balances <= target
+    else:
+        balances = simulate(model, goal.current, months, paths, seed)
+        reached = balances >= target
+    first = np.where(reached.any(axis=0), reached.argmax(axis=0), months + 1)
+    share = np.bincount(first, minlength=months + 2)[:months + 1].cumsum() / paths
+
+    dates = _first_days(today, months)
+    first.sort()
+    reach_dates = {}
+    for percentile in PERCENTILES:
+        month = first[_rank(percentile, paths)]
+        reach_dates[percentile] = None if month > months else dates[month].item()
+    # Sorting each month's balances (a vectorised float32 sort) is several times faster than
+    # np.percentile's partitioning for a handful of percentiles
+    balances.sort(axis=1)
+    bands = {percentile: balances[:, _rank(percentile, paths)].astype(np.float64) for percentile in PERCENTILES}
+    return GoalProjection(goal.id, model, target, history_dates, history, dates, bands, share, reach_dates)
+
+def project_goal(deltas, goal, today=None, months=HORIZON_MONTHS, paths=PATHS, seed=SEED):
+    # Projection of a goal using the per-day changes of trends.load_deltas()
+    history_dates, history = goal_balances(deltas, GOAL_CATEGORIES.get(goal.goal_type), goal.subcategory)
+    return project(goal, history_dates, history, today, months, paths, seed)
+
+def project_goals(conn, goals, today=None):
+    # Every goal's projection, reading the history once
+    deltas = load_deltas(conn)
+    return [project_goal(deltas, goal, today) for goal in goals]
@@ -0,0 +1,96 @@
+# Running balance of every subcategory over time, rebuilt from the history rather than from the
+# entries' current values and dates. The per-day changes (the trigger-maintained
+# subcategory_daily_totals table) are read once into arrays; each resolution then bins them into a
+# dense (period x subcategory) grid and takes one cumulative sum down it, with no pivots or loops
+from collections import Counter
+from dataclasses import dataclass
+
+import numpy as np
+
+from db_utils import day_number_sql, read_transaction
+from engine import TimeSeries
+
+# Resolutions the balances can be shown at
+DAY = "day"
+WEEK = "week"
+MONTH = "month"
+RESOLUTIONS = (DAY, WEEK, MONTH)
+
+def _periods(days, resolution):
+    # Number of the period each day number falls in, counted from the one holding 1970-01-01
+    if resolution == DAY:
+        return days
+    if resolution == WEEK:
+        # Weeks start on Monday; 1970-01-01, day 0, was a Thursday
+        return (days + 3) // 7
+    if resolution == MONTH:
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+    raise ValueError(f"Unknown resolution {resolution!r}, expected one of {', '.join(RESOLUTIONS)}")
+
+def _period_dates(periods, resolution):
+    # First day of each period number, as datetime64
+    if resolution == WEEK:
+        return (periods * 7 - 3).astype('datetime64[D]')
+    if resolution == MONTH:
+        return periods.astype('datetime64[M]').astype('datetime64[D]')
+    return periods.astype('datetime64[D]')
+
+@dataclass(frozen=True)
+class BalanceDeltas:
+    labels: list  # series name per subcategory, qualified by category where a name is shared
+    keys: list  # (category, subcategory) per label
+    series: np.ndarray  # int64 index into labels per change
+    days: np.ndarray  # int64 day numbers
+    deltas: np.ndarray  # float64 net change of that subcategory on that day
+
+    def __len__(self):
+        return len(self.deltas)
+
+    def balances(self, resolution=DAY):
+        # TimeSeries of every subcategory's balance at the end of each period, for every period
+        # from the first change to the last, including periods without changes
+        if not len(self):
+            return TimeSeries()
+        periods = _periods(self.days, resolution)
+        first, last = int(periods.min()), int(periods.max())
+        bins = periods - first
+        width = len(self.labels)
+        cells = bins * width + self.series
+        grid = np.bincount(cells, weights=self.deltas, minlength=(last - first + 1) * width).reshape(last - first + 1, width)
+        grid = np.cumsum(grid, axis=0)
+        dates = _period_dates(np.arange(first, last + 1), resolution)
+        return TimeSeries(dates, {label: grid[:, column] for column, label in enumerate(self.labels)})
+
+def load_deltas(conn):
+    # The per-day changes in (category, subcategory, date) order. Counting the rows per
+    # subcategory first lets the series index be expanded with np.repeat instead of per row; both
+    # reads share one snapshot, so the counts always match the rows even while others write.
+    # Dates SQLite cannot read have no place on the time axis and are left out
+    with read_transaction(conn):
+        groups = conn.execute('''
+            SELECT category, subcategory, COUNT(*)
+            FROM subcategory_daily_totals
+            WHERE delta != 0 AND julianday(date) IS NOT NULL
+            GROUP BY category, subcategory
+            ORDER BY category, subcategory
+        ''').fetchall()
+        rows = conn.execute(f'''
+            SELECT {day_number_sql("date")}, delta
+            FROM subcategory_daily_totals
+            WHERE delta != 0 AND julianday(date) IS NOT NULL
+            ORDER BY category, subcategory, date
+        ''').fetchall()
+    days, deltas = zip(*rows) if rows else ((), ())
+
+    names = Counter(subcategory for _, subcategory, _ in groups)
+    labels = [f"{subcategory} ({category})" if names[subcategory] > 1 else subcategory for category, subcategory, _ in groups]
+    return BalanceDeltas(
+        labels,
+        [(category, subcategory) for category, subcategory, _ in groups],
+        np.repeat(np.arange(len(groups), dtype=np.int64), [count for _, _, count in groups]),
+        np.array(days, dtype=np.int64),
+        np.array(deltas, dtype=np.float64),
+    )
+
+def balance_trends(conn, resolution=DAY):
+    return load_deltas(conn).balances(resolution)
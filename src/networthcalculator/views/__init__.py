@@ -0,0 +1 @@
+# One module per page of the app; app.py imports a page's module the first time it is opened
@@ -0,0 +1,174 @@
+import streamlit as st
+from aggregates import ASSETS, LIABILITIES, CASH_FLOW
+import profiling
+from views.loaders import (
+    load_ledger_summary, load_period_trends, load_balance_trends, load_top_subcategories, load_recent_entries
+)
+from views.widgets import zoom_window
+from trends import RESOLUTIONS, MONTH
+from charts import time_series_trace, trace_budget
+import plotly.graph_objects as go
+
+def analytics():
+    st.header("🔍 Advanced Analytics")
+    
+    # Make columns with number of assets, liabilities, and cash flow, average assets, liabilities
+    with profiling.block("analytics: totals"):
+        summary = load_ledger_summary()
+    num_assets = summary.category(ASSETS).count
+    num_liabilities = summary.category(LIABILITIES).count
+    num_cash_flow = summary.category(CASH_FLOW).count
+    avg_assets = summary.category(ASSETS).average
+    avg_liabilities = summary.category(LIABILITIES).average
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        st.metric("Number of Assets", num_assets)
+    with col2:
+        st.metric("Number of Liabilities", num_liabilities)
+    with col3:
+        st.metric("Number of Cash Flow Entries", num_cash_flow)
+    with col4:
+        st.metric("Average Asset Value", f"€{avg_assets:,.2f}")
+    with col5:
+        st.metric("Average Liability Value", f"€{avg_liabilities:,.2f}")
+    
+    # Debt-to-Asset Ratio
+    total_liabilities = summary.total_liabilities
+    total_assets = summary.total_assets
+    debt_to_asset_ratio = summary.debt_to_asset_ratio
+    
+    st.subheader("⚖️ Debt-to-Asset Ratio")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Total Liabilities", f"€{total_liabilities:,.2f}")
+        st.metric("Total Assets", f"€{total_assets:,.2f}")
+        st.metric("Debt-to-Asset Ratio", f"{debt_to_asset_ratio:.2%}")
+    with col2:
+        # Visualize the debt-to-asset ratio with a pie chart
+        fig = go.Figure(data=[go.Pie(labels=["Debt", "Assets"], values=[total_liabilities, total_assets], hole=0.3)])
+        fig.update_layout(title_text="Debt-to-Asset Ratio", template="plotly_white")
+        st.plotly_chart(fig, use_container_width=True)
+    
+    # Monthly/Yearly trends
+    st.subheader("📅 Monthly/Yearly Trends")
+    with profiling.block("analytics: monthly trends data"):
+        monthly_pivot = load_period_trends('%Y-%m')
+
+    if monthly_pivot is not None:
+        with profiling.block("render: monthly trends chart"):
+            fig = go.Figure()
+            for cat in monthly_pivot.columns:
+                fig.add_bar(x=monthly_pivot.index, y=monthly_pivot[cat], name=cat.capitalize())
+            fig.update_layout(
+                barmode='group',
+                title_text="Monthly Trends by Category",
+                xaxis_title="Month",
+                yaxis_title="Value (€)",
+                template="plotly_white"
+            )
+            st.plotly_chart(fig, use_container_width=True)
+
+        # --- Yearly Trends ---
+        with profiling.block("analytics: yearly trends data"):
+            yearly_pivot = load_period_trends('%Y')
+        if yearly_pivot is not None:
+            with profiling.block("render: yearly trends chart"):
+                fig_yearly = go.Figure()
+                for cat in yearly_pivot.columns:
+                    fig_yearly.add_bar(x=yearly_pivot.index, y=yearly_pivot[cat], name=cat.capitalize())
+                fig_yearly.update_layout(
+                    barmode='group',
+                    title_text="Yearly Trends by Category",
+                    xaxis_title="Year",
+                    yaxis_title="Value (€)",
+                    template="plotly_white"
+                )
+                st.plotly_chart(fig_yearly, use_container_width=True)
+        else:
+            st.write("No yearly data available.")
+    else:
+        st.write("No monthly data available.")
+
+    # Trends in categories over time: every subcategory's balance as rebuilt from the history
+    st.subheader("📊 Trends in Categories Over Time")
+    resolution = st.radio(
+        "Resolution", RESOLUTIONS, index=RESOLUTIONS.index(MONTH), format_func=str.capitalize,
+        horizontal=True, key="category_trends_resolution"
+    )
+    with profiling.block("analytics: category trends data"):
+        category_pivot = load_balance_trends(resolution)
+    if category_pivot is not None:
+        budget = trace_budget(len(category_pivot.columns))
+        category_pivot = zoom_window(category_pivot, key="category_trends_range", budget=budget)
+        with profiling.block("render: category trends chart"):
+            fig_category = go.Figure()
+            for category in category_pivot.columns:
+                fig_category.add_trace(time_series_trace(category_pivot.index, category_pivot[category], category, budget))
+            
+            fig_category.update_layout(title_text="Trends in Categories Over Time", xaxis_title="Date", yaxis_title="Balance (€)", template="plotly_white")
+            st.plotly_chart(fig_category, use_container_width=True)
+    else:
+        st.write("No category data available.")
+    
+    
+            
+
+
+
+
+
+
+
+    # Largest increase/Decrease in asset/liability/cash flow over time
+    # st.subheader("📈 Largest Increase/Decrease in Assets, Liabilities, and Cash Flow")
+    # cursor.execute("SELECT date, category, subcategory, value FROM assets_liabilities ORDER BY date")
+    
+
+    
+
+
+
+    top_n = st.number_input("Number of top subcategories to show", min_value=1, max_value=50, value=5, step=1)
+    with profiling.block("analytics: top subcategories"):
+        top = load_top_subcategories(int(top_n))
+
+    st.subheader("🏆 Top Assets")
+    top_assets = top[ASSETS]
+    for entry in top_assets:
+        subcategory, total_value, num_entries = entry.subcategory, entry.total, entry.count
+        col1, col2, col3 = st.columns(3)
+        col1.write(subcategory)
+        col2.write(f"Total accumalative: €{total_value:,.2f}")
+        col3.write(f"Number of entries: {num_entries}")
+
+    #st.subheader("🏦 Top Liabilities")
+    st.subheader("💳 Top Liabilities")
+    top_liabilities = top[LIABILITIES]
+    for entry in top_liabilities:
+        subcategory, total_value, num_entries = entry.subcategory, entry.total, entry.count
+        col1, col2, col3 = st.columns(3)
+        col1.write(subcategory)
+        col2.write(f"Total accumalative: €{total_value:,.2f}")
+        col3.write(f"Number of entries: {num_entries}")
+
+    st.subheader("💸 Top Cash Flow Categories")
+    top_cash_flow = top[CASH_FLOW]
+    for entry in top_cash_flow:
+        subcategory, total_value, num_entries = entry.subcategory, entry.total, entry.count
+        col1, col2, col3 = st.columns(3)
+        col1.write(subcategory)
+        col2.write(f"Total accumalative: €{total_value:,.2f}")
+        col3.write(f"Number of entries: {num_entries}")
+    
+    # Recently added assets/liabilities/cash flow
+    st.subheader("🕒 Recently Added Entries")
+    with profiling.block("analytics: recent entries"):
+        recent_entries = load_recent_entries()
+    for entry in recent_entries:
+        rowid, date, category, subcategory, description, value = entry
+        col1, col2, col3, col4 = st.columns(4)
+        col1.write(date)
+        col2.write(subcategory)
+        col3.write(description)
+        col4.write(f"€{value:,.2f}")
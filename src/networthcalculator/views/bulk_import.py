@@ -0,0 +1,31 @@
+import streamlit as st
+from importer import import_file
+
+def bulk_import():
+    st.header("📥 Bulk Import")
+    st.write(
+        "Import many entries at once from a CSV file (with a header row) or a JSON array / JSON Lines file. "
+        "Every row needs a date, category (assets, liabilities or cash flow), subcategory, description and value."
+    )
+    uploaded_file = st.file_uploader("Ledger file", type=["csv", "json", "jsonl"])
+    if uploaded_file is not None and st.button("Import"):
+        status = st.empty()
+
+        def show_progress(result):
+            status.write(f"Imported {result.imported:,} rows so far, rejected {result.rejected:,}...")
+
+        try:
+            result = import_file(uploaded_file, progress=show_progress)
+        except ValueError as error:
+            # Includes importer.ParseError for files that cannot be parsed (broken CSV quoting,
+            # invalid JSON) and UnicodeDecodeError for files that are not UTF-8
+            st.error(f"Import stopped: {error}")
+            return
+        status.empty()
+        st.success(f"Imported {result.imported:,} rows.")
+        if result.rejected:
+            st.warning(f"Rejected {result.rejected:,} rows.")
+            # pandas is only needed to list rejected rows
+            import pandas as pd
+
+            st.dataframe(pd.DataFrame(result.errors, columns=['Row', 'Problem']), hide_index=True)
@@ -0,0 +1,310 @@
+import streamlit as st
+from datetime import date
+from db_utils import insert_goal, remove_goal, ASSET_CATEGORIES, LIABILITY_CATEGORIES, CASHFLOW_CATEGORIES
+from aggregates import ASSETS, LIABILITIES, CASH_FLOW
+from writer import write
+import engine
+import profiling
+from views.loaders import load_ledger_summary, load_goals, load_timeline, load_cumulative_index, load_goals_as_of, load_goal_projection
+from views.widgets import zoom_window, profiled_fragment
+from charts import time_series_trace, trace_budget
+from projection import HORIZON_MONTHS
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+def add_goal(summary):
+    
+    with st.expander("Set a New Goal", expanded=False):
+        col1, col2 = st.columns(2)
+        with col1:
+            
+            goal_type = st.selectbox(
+                "Select goal type:",
+                ["Asset", "Liability", "Cash Flow", "Net Worth"],
+                key="goal_type"
+            )
+        with col2:
+            
+            if goal_type == "Asset":
+                goal_subcategory = st.selectbox("Select asset subcategory:", ASSET_CATEGORIES, key="goal_asset_subcat")
+            elif goal_type == "Liability":
+                goal_subcategory = st.selectbox("Select liability subcategory:", LIABILITY_CATEGORIES, key="goal_liab_subcat")
+            elif goal_type == "Cash Flow":
+                goal_subcategory = st.selectbox("Select cash flow subcategory:", CASHFLOW_CATEGORIES, key="goal_cashflow_subcat")
+            else:
+                goal_subcategory = "Net Worth"
+        goal_amount = st.number_input("Enter your financial goal (€):", key="goal_amount")
+
+        if st.button("Set Goal", key="set_goal"):
+            # Progress is recalculated live on every rerun; the stored value records where the goal started
+            progress = engine.goal_amount_needed(goal_type, goal_subcategory, goal_amount, summary)
+            write(insert_goal, goal_type, goal_subcategory, goal_amount, progress)
+            st.success("Goal set successfully!")
+            # Rerun the whole page, not just the goals: the timeline's goal picker and the
+            # past-date view list the goals as well
+            st.rerun()
+
+def delete_goal(goal_id):
+    write(remove_goal, goal_id)
+    st.success("Goal deleted successfully!")
+    st.rerun()  # The whole page, as after adding a goal
+
+def timeline_figure(pivot_df):
+    fig = make_subplots(specs=[[{"secondary_y": True}]])
+
+    # Net Worth on primary y-axis
+    fig.add_trace(
+        time_series_trace(pivot_df.index, pivot_df['Net Worth'], 'Net Worth', trace_budget(2)),
+        secondary_y=False,
+    )
+
+    # Cash Flow on secondary y-axis
+    fig.add_trace(
+        time_series_trace(pivot_df.index, pivot_df['Cash Flow'], 'Cash Flow', trace_budget(2)),
+        secondary_y=True,
+    )
+
+    fig.update_layout(
+        title="Net Worth and Cash Flow Over Time",
+        xaxis_title="Date",
+        template="plotly_white",
+        legend_title="Metric"
+    )
+    fig.update_yaxes(title_text="Net Worth (€)", secondary_y=False)
+    fig.update_yaxes(title_text="Cash Flow (€)", secondary_y=True)
+    return fig
+
+def goal_label(goal):
+    return f"{goal.goal_type}: {goal.subcategory} (€{goal.amount:,.0f})"
+
+def projection_caption(projection):
+    # One line on when the simulated paths reach a goal
+    if projection.reached[0] == 1:
+        return "Projection: already reached."
+    years = HORIZON_MONTHS // 12
+    median, late = projection.reach_dates[50], projection.reach_dates[90]
+    if median is None:
+        return f"Projection: {projection.probability:.0%} chance of reaching it within {years} years on current trends."
+    late = f"{late:%b %Y}" if late else f"after {years} years"
+    return (
+        f"Projection: most likely reached in {median:%b %Y} (80% range {projection.reach_dates[10]:%b %Y} – {late}), "
+        f"{projection.probability:.0%} chance within {years} years."
+    )
+
+def add_projection(fig, projection, label, months, with_history):
+    # A goal's projected percentile bands (10-90 and 25-75) and median for the next `months`
+    # months, its target, and, unless the figure already shows it, the balance's monthly history
+    dates = projection.dates[:months + 1]
+    if with_history and len(projection.history):
+        fig.add_trace(go.Scatter(x=projection.history_dates, y=projection.history, mode='lines', name=label), secondary_y=False)
+    for low, high, color in ((10, 90, 'rgba(99, 110, 250, 0.15)'), (25, 75, 'rgba(99, 110, 250, 0.3)')):
+        fig.add_trace(go.Scatter(
+            x=dates, y=projection.bands[high][:months + 1], mode='lines', line=dict(width=0), showlegend=False, hoverinfo='skip'
+        ), secondary_y=False)
+        fig.add_trace(go.Scatter(
+            x=dates, y=projection.bands[low][:months + 1], mode='lines', line=dict(width=0), fill='tonexty', fillcolor=color,
+            name=f"{low}th-{high}th percentile"
+        ), secondary_y=False)
+    fig.add_trace(go.Scatter(
+        x=dates, y=projection.bands[50][:months + 1], mode='lines', line=dict(dash='dot'), name=f"{label} (projected median)"
+    ), secondary_y=False)
+    fig.add_hline(y=projection.target, line_dash='dash', annotation_text="Goal", secondary_y=False)
+
+def dashboard():
+    st.header("🪙 Net Worth Dashboard")
+
+    # Each section is a fragment that loads its own (cached) data, so using a widget inside one,
+    # such as deleting a goal or zooming the timeline, reruns only that section
+    metrics()
+
+    # Custom goals and progress tracking
+    st.subheader("🎯 Goals and Progress Tracking")
+    st.write("Set your financial goals and track your progress towards achieving them.")
+    goals_section()
+
+    # Display the net worth and cash flow over time
+    st.subheader("📈 Net Worth and Cash Flow Over Time")
+    timeline()
+
+    # Pie charts for the distribution of assets, liabilities, and cash flow
+    st.subheader("📊 Distribution of Assets, Liabilities, and Cash Flow")
+    distributions()
+
+    # Balances, totals and goals on any past date, and what changed between two dates
+    as_of_section()
+
+@profiled_fragment("metrics")
+def metrics():
+    # Get the total assets, liabilities, and cash flow
+    with profiling.block("dashboard: totals"):
+        summary = load_ledger_summary()
+    total_assets = summary.total_assets
+    total_liabilities = summary.total_liabilities
+    total_cash_flow = summary.total_cash_flow
+    # Calculate net worth
+    net_worth = summary.net_worth
+    # Display the totals
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Assets", f"€{total_assets:,.2f}")
+    with col2:
+        st.metric("Total Liabilities", f"€{total_liabilities:,.2f}")
+    with col3:
+        st.metric("Total Cash Flow", f"€{total_cash_flow:,.2f}")
+    with col4:
+        st.metric("Net Worth", f"€{net_worth:,.2f}")
+
+@profiled_fragment("goals")
+def goals_section():
+    # Load existing goals from the database and display them
+    with profiling.block("dashboard: goals"):
+        goals = load_goals()
+    if goals:
+        for goal in goals:
+            rowid, goal_type, goal_subcategory, goal_amount, progress = goal.id, goal.goal_type, goal.subcategory, goal.amount, goal.amount_needed
+            col1, col2, col3, col4, col5 = st.columns(5)
+            col1.write(f"**Goal:** {goal_amount}")
+            col2.write(f"**Type:** {goal_type}")
+            col3.write(f"**Subcategory:** {goal_subcategory}")
+            col4.write(f"**Amount Needed:** €{progress:,.2f}")
+            if col5.button("🗑️", key=f"delete_goal_{rowid}"):
+                delete_goal(rowid)
+            with profiling.block("dashboard: goal projection"):
+                projection = load_goal_projection(rowid)
+            if projection is not None:
+                st.caption(projection_caption(projection))
+    else:
+        st.info("No goals set yet.")
+
+    # Add a new goal
+    add_goal(load_ledger_summary())
+
+@profiled_fragment("timeline")
+def timeline():
+    with profiling.block("dashboard: timeline data"):
+        pivot_df = load_timeline()
+    pivot_df = zoom_window(pivot_df, key="timeline_range", budget=trace_budget(2))
+
+    # Optionally a goal's projected percentile bands after the history
+    goals = {goal.id: goal for goal in load_goals()}
+    col1, col2 = st.columns([3, 1])
+    goal_id = col1.selectbox(
+        "Project a goal", [None] + list(goals), key="timeline_goal",
+        format_func=lambda goal_id: "None" if goal_id is None else goal_label(goals[goal_id])
+    )
+    years = col2.slider("Years ahead", 1, HORIZON_MONTHS // 12, 10, key="timeline_projection_years", disabled=goal_id is None)
+    goal = goals.get(goal_id)
+    projection = None
+    if goal is not None:
+        with profiling.block("dashboard: goal projection"):
+            projection = load_goal_projection(goal.id)
+
+    with profiling.block("plotly: timeline figure"):
+        fig = timeline_figure(pivot_df)
+        if projection is not None:
+            add_projection(fig, projection, goal.subcategory, years * 12, with_history=goal.goal_type != "Net Worth")
+    with profiling.block("render: timeline chart"):
+        st.plotly_chart(fig, use_container_width=True)
+
+@profiled_fragment("distributions")
+def distributions():
+    summary = load_ledger_summary()
+    with profiling.block("render: distribution charts"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.subheader("Assets Distribution")
+            assets_pie = summary.subcategory_totals(ASSETS)
+            if assets_pie:
+                fig_assets = go.Figure(data=[go.Pie(labels=list(assets_pie), values=list(assets_pie.values()), hole=0.3)])
+                fig_assets.update_layout(title_text="Assets Distribution")
+                st.plotly_chart(fig_assets, use_container_width=True)
+            else:
+                st.write("No assets data available.")
+        with col2:
+            st.subheader("Liabilities Distribution")
+            liabilities_pie = summary.subcategory_totals(LIABILITIES)
+            if liabilities_pie:
+                fig_liabilities = go.Figure(data=[go.Pie(labels=list(liabilities_pie), values=list(liabilities_pie.values()), hole=0.3)])
+                fig_liabilities.update_layout(title_text="Liabilities Distribution")
+                st.plotly_chart(fig_liabilities, use_container_width=True)
+            else:
+                st.write("No liabilities data available.")
+        with col3:
+            st.subheader("Cash Flow Distribution")
+            cash_flow_pie = summary.subcategory_totals(CASH_FLOW)
+            if cash_flow_pie:
+                fig_cash_flow = go.Figure(data=[go.Pie(labels=list(cash_flow_pie), values=list(cash_flow_pie.values()), hole=0.3)])
+                fig_cash_flow.update_layout(title_text="Cash Flow Distribution")
+                st.plotly_chart(fig_cash_flow, use_container_width=True)
+            else:
+                st.write("No cash flow data available.")
+
+@profiled_fragment("as of")
+def as_of_section():
+    st.subheader("🕰️ Net Worth on a Past Date")
+    with profiling.block("dashboard: cumulative index"):
+        index = load_cumulative_index()
+    as_of_tab, compare_tab = st.tabs(["As of", "Compare two dates"])
+
+    with as_of_tab:
+        day = st.date_input("As of", value=date.today(), key="as_of_date")
+        snapshot = index.snapshot(day.isoformat())
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total Assets", f"€{snapshot.total_assets:,.2f}")
+        col2.metric("Total Liabilities", f"€{snapshot.total_liabilities:,.2f}")
+        col3.metric("Total Cash Flow", f"€{snapshot.total_cash_flow:,.2f}")
+        col4.metric("Net Worth", f"€{snapshot.net_worth:,.2f}")
+
+        balances = sorted(snapshot.subcategories.items())
+        if balances:
+            st.dataframe(
+                {
+                    "Category": [category.capitalize() for (category, _), _ in balances],
+                    "Subcategory": [subcategory for (_, subcategory), _ in balances],
+                    "Balance (€)": [stats.total for _, stats in balances],
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
+        goals = load_goals_as_of(day.isoformat())
+        if goals:
+            st.caption("Goals as of this date")
+            st.dataframe(
+                {
+                    "Goal (€)": [goal.amount for goal in goals],
+                    "Type": [goal.goal_type for goal in goals],
+                    "Subcategory": [goal.subcategory for goal in goals],
+                    "Current (€)": [goal.current for goal in goals],
+                    "Amount Needed (€)": [goal.amount_needed for goal in goals],
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
+
+    with compare_tab:
+        col1, col2 = st.columns(2)
+        start = col1.date_input("From", value=date.today().replace(day=1), key="compare_from")
+        end = col2.date_input("To", value=date.today(), key="compare_to")
+        before, after = index.snapshot(start.isoformat()), index.snapshot(end.isoformat())
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Net Worth", f"€{after.net_worth:,.2f}", f"{after.net_worth - before.net_worth:+,.2f}")
+        col2.metric("Total Assets", f"€{after.total_assets:,.2f}", f"{after.total_assets - before.total_assets:+,.2f}")
+        col3.metric(
+            "Total Liabilities", f"€{after.total_liabilities:,.2f}",
+            f"{after.total_liabilities - before.total_liabilities:+,.2f}", delta_color="inverse"
+        )
+        changes = index.compare(start.isoformat(), end.isoformat())
+        if changes:
+            st.dataframe(
+                {
+                    "Category": [change.category.capitalize() for change in changes],
+                    "Subcategory": [change.subcategory for change in changes],
+                    f"{start} (€)": [change.before for change in changes],
+                    f"{end} (€)": [change.after for change in changes],
+                    "Change (€)": [change.change for change in changes],
+                },
+                hide_index=True,
+                use_container_width=True,
+            )
+        else:
+            st.info("No balances changed between these dates.")
@@ -0,0 +1,45 @@
+import streamlit as st
+from db_utils import insert_entry, ASSET_CATEGORIES, LIABILITY_CATEGORIES, CASHFLOW_CATEGORIES
+from writer import write
+
+def add_assets():
+    st.header("➕ Add New Assets")
+
+    #Input fields for asset details
+    date = st.date_input("Date")
+    category = "assets"
+    subcategory = st.selectbox("Category", ASSET_CATEGORIES)
+    value = st.number_input("Value", min_value=0.0, step=0.01)
+    description = st.text_input("Description")
+    if st.button("Add Asset"):
+        # Here you would implement the logic to add the asset to the database
+        write(insert_entry, date.isoformat(), category, subcategory, description, value)
+        st.success("Asset added successfully!")
+
+def add_liabilities():
+    st.header("➕ Add New Liabilities")
+
+    #Input fields for liability details
+    date = st.date_input("Date")
+    category = "liabilities"
+    subcategory = st.selectbox("Category", LIABILITY_CATEGORIES)
+    value = st.number_input("Value", min_value=0.0, step=0.01)
+    description = st.text_input("Description")
+    if st.button("Add Liability"):
+        # Here you would implement the logic to add the liability to the database
+        write(insert_entry, date.isoformat(), category, subcategory, description, value)
+        st.success("Liability added successfully!")
+
+def add_cash_flow():
+    st.header("➕ Add Cash Flow")
+
+    #Input fields for cash flow details
+    date = st.date_input("Date")
+    category = "cash flow"
+    subcategory = st.selectbox("Category", CASHFLOW_CATEGORIES)
+    value = st.number_input("Value", min_value=0.0, step=0.01)
+    description = st.text_input("Description")
+    if st.button("Add Cash Flow"):
+        # Here you would implement the logic to add the cash flow to the database
+        write(insert_entry, date.isoformat(), category, subcategory, description, value)
+        st.success("Cash Flow added successfully!")
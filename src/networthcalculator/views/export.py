@@ -0,0 +1,39 @@
+import streamlit as st
+from exporter import export_tables, EXPORT_FORMATS
+import profiling
+
+def export_data():
+    st.header("📤 Export Data")
+    st.write("Export your data for backup or analysis. Nothing is read from the database until you click Prepare export.")
+
+    file_format = st.radio(
+        "Format",
+        list(EXPORT_FORMATS),
+        format_func=lambda key: EXPORT_FORMATS[key].label,
+        horizontal=True
+    )
+    col1, col2 = st.columns(2)
+    include_history = col1.checkbox("Include change history")
+    include_goals = col2.checkbox("Include goals")
+    tables = ["entries"] + (["history"] if include_history else []) + (["goals"] if include_goals else [])
+    if len(tables) > 1 and file_format != "xlsx":
+        st.caption("Several tables are exported as a zip archive with one file per table.")
+
+    if st.button("Prepare export"):
+        try:
+            with profiling.block(f"export: {file_format}") as timing:
+                result = export_tables(tables, file_format)
+                timing.rows = result.rows
+        except ImportError as error:
+            st.error(str(error))
+            return
+        # Streamlit only accepts bytes, strings and plain file objects, and keeps the download in
+        # memory anyway, so the spooled file is read out and closed here
+        with result.buffer:
+            data = result.buffer.read()
+        st.download_button(
+            label=f"Download {result.file_name} ({result.rows:,} rows)",
+            data=data,
+            file_name=result.file_name,
+            mime=result.mime
+        )
@@ -0,0 +1,96 @@
+import pandas as pd
+
+from db_utils import get_db_connection
+import engine
+import asof
+import trends
+import projection
+import ledger
+import profiling
+from cache import versioned_cache
+
+# Cached reads, shared between sessions until the next write (treat the results as read-only)
+
+def load_ledger():
+    # The in-memory ledger the totals, trends and counts below are computed from; it has its own
+    # process-wide copy that catches up after writes, so it is not cached here
+    with profiling.block("ledger: refresh") as timing:
+        current = ledger.shared(get_db_connection())
+        timing.rows = len(current)
+        timing.bytes = current.nbytes
+    return current
+
+@versioned_cache
+def load_ledger_summary():
+    return load_ledger().summary()
+
+@versioned_cache
+def load_goals():
+    # Goals are measured against the cached ledger totals
+    return engine.goals_for_summary(get_db_connection(), load_ledger_summary())
+
+def series_frame(series):
+    # DataFrame view of an engine TimeSeries, indexed by date, for plotting
+    with profiling.block("pandas: series frame") as timing:
+        frame = pd.DataFrame(series.columns, index=pd.to_datetime(pd.Index(series.dates)))
+        timing.measure(frame)
+    return frame
+
+@versioned_cache
+def load_timeline():
+    return series_frame(engine.net_worth_series(get_db_connection()))
+
+@versioned_cache
+def count_entries(category, subcategory=None, search=None):
+    # Plain category and subcategory counts come from the in-memory ledger, searches from SQLite
+    if search is None:
+        return load_ledger().count(category, subcategory)
+    return engine.count_entries(get_db_connection(), category, subcategory, search)
+
+@versioned_cache
+def load_entries_page(category, subcategory, sort_column, descending, page, page_size, search=None):
+    return engine.entries_page(get_db_connection(), category, subcategory, sort_column, descending, page, page_size, search)
+
+@versioned_cache
+def load_period_trends(period_format):
+    # Totals per period and category, one column per category. Months and years are already
+    # pre-aggregated in the rollup tables, which is cheaper than grouping the in-memory ledger
+    series = engine.period_trends(get_db_connection(), period_format)
+    return series_frame(series) if len(series) else None
+
+@versioned_cache
+def load_balance_deltas():
+    # Every subcategory's per-day changes from the history, read once per data version
+    return trends.load_deltas(get_db_connection())
+
+@versioned_cache
+def load_balance_trends(resolution):
+    # Running balance per subcategory, one column per subcategory, binned from the cached deltas
+    series = load_balance_deltas().balances(resolution)
+    return series_frame(series) if len(series) else None
+
+@versioned_cache
+def load_goal_projection(goal_id):
+    # Monte Carlo projection of one goal, simulated once per goal and data version; None if the
+    # goal no longer exists
+    goal = next((goal for goal in load_goals() if goal.id == goal_id), None)
+    if goal is None:
+        return None
+    return projection.project_goal(load_balance_deltas(), goal)
+
+@versioned_cache
+def load_top_subcategories(limit):
+    return load_ledger().top_subcategories(limit)
+
+@versioned_cache
+def load_recent_entries():
+    return engine.recent_entries(get_db_connection())
+
+@versioned_cache
+def load_cumulative_index():
+    # Built once per data version; every as-of question after that is a binary search
+    return asof.build_index(get_db_connection())
+
+@versioned_cache
+def load_goals_as_of(day):
+    return asof.goals_as_of(get_db_connection(), load_cumulative_index(), day)
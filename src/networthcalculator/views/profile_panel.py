@@ -0,0 +1,27 @@
+import streamlit as st
+import pandas as pd
+
+def profile_panel(run):
+    # Timing breakdown of the rerun that just finished; the same data is appended to profiling.LOG_PATH
+    with st.sidebar.expander(f"⏱️ Profile: {run.seconds * 1000:,.0f} ms", expanded=False):
+        col1, col2 = st.columns(2)
+        col1.metric("SQL", f"{run.sql_seconds * 1000:,.1f} ms")
+        col2.metric("Queries", len(run.queries()))
+        blocks = run.blocks()
+        if blocks:
+            st.caption("Sections (SQL included)")
+            st.dataframe(pd.DataFrame({
+                "Section": ["\u2003" * timing.depth + timing.name for timing in blocks],
+                "ms": [timing.seconds * 1000 for timing in blocks],
+                "Rows": [timing.rows for timing in blocks],
+                "KiB": [timing.bytes / 1024 for timing in blocks],
+            }), hide_index=True, use_container_width=True)
+        queries = run.queries()
+        if queries:
+            st.caption("Queries")
+            st.dataframe(pd.DataFrame({
+                "SQL": [timing.name for timing in queries],
+                "ms": [timing.seconds * 1000 for timing in queries],
+                "Rows": [timing.rows for timing in queries],
+                "KiB": [timing.bytes / 1024 for timing in queries],
+            }), hide_index=True, use_container_width=True)
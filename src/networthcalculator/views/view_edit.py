@@ -0,0 +1,119 @@
+import streamlit as st
+from db_utils import update_entries, delete_entries, ASSET_CATEGORIES, LIABILITY_CATEGORIES, CASHFLOW_CATEGORIES
+import profiling
+from engine import EntrySearch
+from writer import write
+from views.loaders import count_entries, load_entries_page
+import pandas as pd
+
+# Columns the View/Edit grid can be sorted by (see engine.ENTRY_SORT_COLUMNS)
+SORT_COLUMNS = {
+    "Date": "date",
+    "Subcategory": "subcategory",
+    "Value": "value",
+}
+PAGE_SIZES = [25, 50, 100, 250]
+
+def save_grid_changes(changes, to_delete):
+    # Runs on the writer thread as one job, so a save's edits and deletions land together
+    update_entries(changes)
+    delete_entries(to_delete)
+
+def search_filters(key):
+    # The description search box and the date and value filters; None when nothing is filtered on
+    col1, col2 = st.columns([3, 1])
+    text = col1.text_input("Search descriptions", key=f"{key}_search", placeholder="Words or the start of words")
+    include_history = col2.checkbox("Include earlier descriptions", key=f"{key}_search_history", help="Also find entries by what their description was before an edit. Edits from months compacted into the archive are not searched")
+    with st.expander("Filter by date and value"):
+        col1, col2, col3 = st.columns(3)
+        dates = col1.date_input("Dates", value=(), key=f"{key}_dates")
+        min_value = col2.number_input("Minimum value (€)", value=None, step=100.0, key=f"{key}_min_value")
+        max_value = col3.number_input("Maximum value (€)", value=None, step=100.0, key=f"{key}_max_value")
+
+    # A date range is picked one end at a time, so it may only have a start yet
+    start = dates[0].isoformat() if len(dates) > 0 else None
+    end = dates[1].isoformat() if len(dates) > 1 else None
+    if not text.strip() and start is None and end is None and min_value is None and max_value is None:
+        return None
+    return EntrySearch(text.strip(), include_history, start, end, min_value, max_value)
+
+def entries_grid(category, label, subcategories):
+    # One page of a category's entries as an editable grid, filtered, searched and sorted in SQLite
+    key = category.replace(" ", "_")
+    col1, col2, col3, col4 = st.columns(4)
+    subcategory = col1.selectbox("Subcategory", ["All"] + subcategories, key=f"{key}_filter")
+    sort_by = col2.selectbox("Sort by", list(SORT_COLUMNS), key=f"{key}_sort")
+    descending = col3.toggle("Descending", value=True, key=f"{key}_descending")
+    page_size = col4.selectbox("Rows per page", PAGE_SIZES, key=f"{key}_page_size")
+
+    search = search_filters(key)
+
+    subcategory = None if subcategory == "All" else subcategory
+    with profiling.block(f"view/edit: count {category}"):
+        total_rows = count_entries(category, subcategory, search)
+    if not total_rows:
+        st.info(f"No {label.lower()} entries found." if search is None else f"No {label.lower()} entries match the search.")
+        return
+    num_pages = (total_rows + page_size - 1) // page_size
+    page = st.number_input(f"Page (of {num_pages})", min_value=1, max_value=num_pages, value=1, step=1, key=f"{key}_page")
+
+    with profiling.block(f"view/edit: {category} page"):
+        rows = load_entries_page(category, subcategory, SORT_COLUMNS[sort_by], descending, int(page), page_size, search)
+    with profiling.block(f"pandas: {category} grid") as timing:
+        page_df = pd.DataFrame(rows, columns=['id', 'date', 'category', 'subcategory', 'description', 'value'])
+        page_df['date'] = pd.to_datetime(page_df['date']).dt.date
+        page_df['delete'] = False
+        timing.measure(page_df)
+
+    with st.form(key=f"{key}_form"):
+        edited_df = st.data_editor(
+            page_df,
+            key=f"{key}_editor",
+            hide_index=True,
+            use_container_width=True,
+            column_order=['subcategory', 'description', 'value', 'date', 'delete'],
+            disabled=['id', 'category', 'subcategory'],
+            column_config={
+                'subcategory': st.column_config.TextColumn("Subcategory"),
+                'description': st.column_config.TextColumn("Description"),
+                'value': st.column_config.NumberColumn("Value", format="€%.2f", step=0.01),
+                'date': st.column_config.DateColumn("Date"),
+                'delete': st.column_config.CheckboxColumn("Delete"),
+            },
+        )
+        submitted = st.form_submit_button("Save changes")
+
+    if submitted:
+        to_delete = edited_df.loc[edited_df['delete'], 'id'].tolist()
+        changed = edited_df[~edited_df['delete']].merge(page_df, on='id', suffixes=('', '_before'))
+        changed = changed[
+            (changed['value'] != changed['value_before'])
+            | (changed['description'] != changed['description_before'])
+            | (changed['date'] != changed['date_before'])
+        ]
+        changed = changed[changed['value'].notna() & changed['date'].notna()]
+        changes = [
+            (int(row.id), float(row.value), row.description or "", row.date.isoformat())
+            for row in changed.itertuples()
+        ]
+        # Edits and deletions from one save are committed together
+        write(save_grid_changes, changes, [int(rowid) for rowid in to_delete])
+        st.success(f"{label}: {len(changes)} updated, {len(to_delete)} deleted.")
+        st.rerun()
+
+def view_edit_data():
+    st.header("📝 View & Edit Data")
+
+    tabs = st.tabs(["Assets", "Liabilities", "Cash Flow"])
+
+    with tabs[0]:
+        st.header("Assets")
+        entries_grid('assets', "Assets", ASSET_CATEGORIES)
+
+    with tabs[1]:
+        st.header("Liabilities")
+        entries_grid('liabilities', "Liabilities", LIABILITY_CATEGORIES)
+
+    with tabs[2]:
+        st.header("Cash Flow")
+        entries_grid('cash flow', "Cash Flow", CASHFLOW_CATEGORIES)
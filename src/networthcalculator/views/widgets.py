@@ -0,0 +1,33 @@
+from functools import wraps
+
+import streamlit as st
+import profiling
+from charts import window
+
+def profiled_fragment(name):
+    # st.fragment whose reruns are profiled too: inside a full rerun it is timed as a block of the
+    # page's run, and when only the fragment reruns (a widget inside it changed) it gets a run of
+    # its own in profile.log, since the page's run and the sidebar panel are not redrawn
+    def decorate(func):
+        @wraps(func)
+        def run_fragment(*args, **kwargs):
+            if profiling.active_run() is not None or not st.session_state.get(profiling.TOGGLE_KEY):
+                with profiling.block(f"fragment: {name}"):
+                    return func(*args, **kwargs)
+            run = profiling.start_run(f"fragment: {name}")
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiling.finish_run(run)
+        return st.fragment(run_fragment)
+    return decorate
+
+def zoom_window(frame, key, budget):
+    # Date range slider for series longer than their point budget. The chosen window is
+    # downsampled again on the server, so zooming in brings back detail without ever sending
+    # the browser more than the budget
+    if len(frame) <= budget:
+        return frame
+    first, last = frame.index[0].date(), frame.index[-1].date()
+    start, end = st.slider("Date range", min_value=first, max_value=last, value=(first, last), key=key, format="YYYY-MM-DD")
+    return window(frame, start, end)
@@ -0,0 +1,127 @@
+# One background thread performs every write in the process. Sessions hand it work and get a
+# Future back; the thread groups whatever is waiting into a single transaction, so concurrent
+# saves never fight over SQLite's write lock and share one commit (and one fsync) between them.
+# Reads are unaffected and keep running on the sessions' own connections under WAL.
+import queue
+import threading
+from concurrent.futures import Future
+from itertools import groupby
+
+from db_utils import transaction
+
+# Most jobs committed together in one transaction
+MAX_BATCH_SIZE = 256
+# Seconds a caller waits for its write before giving up
+WRITE_TIMEOUT = 60
+
+class WriteQueue:
+    def __init__(self, max_batch_size=MAX_BATCH_SIZE):
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.jobs = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="networth-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, func, *args, **kwargs):
+        # Queue func(*args, **kwargs) to run on the writer thread; the Future resolves to its
+        # return value once the transaction it ran in has committed
+        return self._put(func, args, kwargs, alone=False)
+
+    def submit_alone(self, func, *args, **kwargs):
+        # Queue a job that runs on the writer thread by itself, outside the batch transaction, for
+        # work that commits in transactions of its own or has to run outside one (such as ATTACH),
+        # and for bulk writes: SQLite writes thousands of rows into a savepoint of the batch
+        # transaction many times slower than into a transaction of their own. Other writes wait
+        # until it has finished
+        return self._put(func, args, kwargs, alone=True)
+
+    def _put(self, func, args, kwargs, alone):
+        future = Future()
+        self._queue.put((func, args, kwargs, future, alone))
+        self._ensure_started()
+        return future
+
+    def write(self, func, *args, **kwargs):
+        # submit() and wait for the result, re-raising the job's exception if it failed
+        return self.submit(func, *args, **kwargs).result(timeout=WRITE_TIMEOUT)
+
+    def write_alone(self, func, *args, **kwargs):
+        return self.submit_alone(func, *args, **kwargs).result(timeout=WRITE_TIMEOUT)
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = [job for job in self._next_batch() if job[3].set_running_or_notify_cancel()]
+            # Runs of ordinary jobs share a transaction; jobs submitted alone run in between, in
+            # the order they were queued
+            for alone, jobs in groupby(batch, key=lambda job: job[4]):
+                if alone:
+                    for job in jobs:
+                        self._run_alone(job)
+                else:
+                    self._run_batch(list(jobs))
+
+    def _run_alone(self, job):
+        func, args, kwargs, future, _ = job
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as error:
+            future.set_exception(error)
+            return
+        self.batches += 1
+        self.jobs += 1
+        future.set_result(result)
+
+    def _run_batch(self, batch):
+        results = []
+        try:
+            with transaction():
+                for func, args, kwargs, future, _ in batch:
+                    # Each job runs in its own savepoint, so one failing job is rolled back
+                    # on its own and the rest of the batch still commits
+                    try:
+                        with transaction():
+                            results.append((future, func(*args, **kwargs), None))
+                    except Exception as error:
+                        results.append((future, None, error))
+        except BaseException as error:
+            # The commit itself failed, so nothing in the batch was written
+            for _, _, _, future, _ in batch:
+                future.set_exception(error)
+            return
+        self.batches += 1
+        self.jobs += len(batch)
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+writer = WriteQueue()
+
+def submit(func, *args, **kwargs):
+    return writer.submit(func, *args, **kwargs)
+
+def write(func, *args, **kwargs):
+    return writer.write(func, *args, **kwargs)
+
+def submit_alone(func, *args, **kwargs):
+    return writer.submit_alone(func, *args, **kwargs)
+
+def write_alone(func, *args, **kwargs):
+    return writer.write_alone(func, *args, **kwargs)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app's modules import each other as top-level modules (from db_utils import ...), as they do
+# when Streamlit runs app.py from its folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'networthcalculator'))
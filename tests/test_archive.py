@@ -0,0 +1,130 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from db_utils import (
+    use_database, create_table, insert_entry, update_entry, delete_entries, get_db_connection, transaction,
+    rebuild_daily_totals, rebuild_subcategory_daily_totals, ASSET_CATEGORIES, LIABILITY_CATEGORIES, CASHFLOW_CATEGORIES,
+)
+from archive import compact_history, entry_history, ARCHIVE_SCHEMA
+from asof import build_index
+from engine import ledger_totals
+from writer import write
+
+SUBCATEGORIES = {"assets": ASSET_CATEGORIES, "liabilities": LIABILITY_CATEGORIES, "cash flow": CASHFLOW_CATEGORIES}
+FIRST_DAY = date(2019, 1, 1)
+LAST_DAY = date(2024, 12, 31)
+HORIZON = date(2022, 1, 1)
+
+def test_compaction_runs_on_the_writer_and_keeps_balances(tmp_path):
+    use_database(str(tmp_path / "networth.db"))
+    create_table()
+    insert_entry("2020-01-10", "assets", "Stocks", "Index fund", 1000.0)
+    entry_id = get_db_connection().execute("SELECT id FROM entries").fetchone()[0]
+    update_entry(entry_id, 1100.0, "Index fund", "2020-01-20")
+    update_entry(entry_id, 1250.0, "Index fund", "2020-02-15")
+    net_worth = ledger_totals(get_db_connection()).net_worth
+
+    result = compact_history("2021-01-01")
+    assert (result.archived, result.folded, result.checkpoints) == (3, 3, 2)
+    assert ledger_totals(get_db_connection()).net_worth == net_worth
+    # Every raw change can still be read back from the archive
+    assert [row[3] for row in entry_history(entry_id)] == [1000.0, 1100.0, 1250.0]
+
+    # The writer's connection no longer has the archive attached, and keeps taking saves
+    schemas = write(lambda: [row[1] for row in get_db_connection().execute("PRAGMA database_list")])
+    assert ARCHIVE_SCHEMA not in schemas
+    write(insert_entry, "2024-01-31", "assets", "Gold", "Coins", 300.0)
+    assert ledger_totals(get_db_connection()).net_worth == net_worth + 300.0
+
+def random_day(rng):
+    return FIRST_DAY + timedelta(days=rng.randrange((LAST_DAY - FIRST_DAY).days + 1))
+
+def seed_ledger(rng, entries=40, edits=400, deletions=3):
+    # Entries in every category, edited at random, sometimes to an earlier date than before
+    for _ in range(entries):
+        category = rng.choice(list(SUBCATEGORIES))
+        insert_entry(random_day(rng).isoformat(), category, rng.choice(SUBCATEGORIES[category]), f"Entry {rng.randrange(1000)}", round(rng.uniform(0, 5000), 2))
+    for _ in range(edits):
+        entry_id = rng.randrange(1, entries + 1)
+        update_entry(entry_id, round(rng.uniform(0, 5000), 2), f"Edit {rng.randrange(1000)}", random_day(rng).isoformat())
+    delete_entries(rng.sample(range(1, entries + 1), deletions))
+
+def checked_days():
+    # The end of every month before the horizon, and every day from it on
+    days = []
+    month = FIRST_DAY
+    while month < HORIZON:
+        following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        days.append(following - timedelta(days=1))
+        month = following
+    day = HORIZON
+    while day <= LAST_DAY:
+        days.append(day)
+        day += timedelta(days=1)
+    return [day.isoformat() for day in days]
+
+def balances(conn, days):
+    # Per subcategory balances from the as-of index, and per category running totals from
+    # daily_totals, at the end of each day
+    index = build_index(conn)
+    running = {}
+    for day, category, running_total in conn.execute("SELECT date, category, running_total FROM daily_totals ORDER BY date"):
+        running.setdefault(category, []).append((day, running_total))
+    result = {}
+    for day in days:
+        snapshot = index.snapshot(day)
+        result[day] = {key: stats.total for key, stats in snapshot.subcategories.items() if abs(stats.total) > 1e-6}
+        for category, totals in running.items():
+            earlier = [total for total_day, total in totals if total_day <= day]
+            if earlier and abs(earlier[-1]) > 1e-6:
+                result[day][category] = earlier[-1]
+    return result
+
+def totals_tables(conn):
+    # The daily_totals and subcategory_daily_totals rows that change a balance; saves can leave
+    # rows whose changes cancelled out, which a rebuild does not write
+    daily = conn.execute("SELECT date, category, delta, running_total FROM daily_totals WHERE ABS(delta) > 1e-6").fetchall()
+    subcategory = {
+        (category, subcategory, day): delta
+        for category, subcategory, day, delta in conn.execute("SELECT category, subcategory, date, delta FROM subcategory_daily_totals WHERE ABS(delta) > 1e-6")
+    }
+    return (
+        {(day, category): delta for day, category, delta, _ in daily},
+        {(day, category): running_total for day, category, _, running_total in daily},
+        subcategory,
+    )
+
+def test_compaction_keeps_balances_totals_and_history(tmp_path):
+    use_database(str(tmp_path / "networth.db"))
+    create_table()
+    seed_ledger(random.Random(42))
+    conn = get_db_connection()
+    days = checked_days()
+    before = balances(conn, days)
+    entry_ids = [entry_id for entry_id, in conn.execute("SELECT id FROM entries ORDER BY id")]
+    histories = {entry_id: entry_history(entry_id, include_archive=False) for entry_id in entry_ids}
+    history_rows = conn.execute("SELECT COUNT(*) FROM assets_liabilities_history").fetchone()[0]
+
+    result = compact_history(HORIZON.isoformat())
+    assert result.folded > 0
+    assert conn.execute("SELECT COUNT(*) FROM assets_liabilities_history").fetchone()[0] < history_rows
+
+    after = balances(conn, days)
+    for day in days:
+        assert after[day] == pytest.approx(before[day]), day
+
+    # The running totals kept up to date by compaction match the ones rebuilt from the compacted history
+    kept = totals_tables(conn)
+    with transaction() as cursor:
+        rebuild_daily_totals(cursor)
+        rebuild_subcategory_daily_totals(cursor)
+    rebuilt = totals_tables(conn)
+    for kept_rows, rebuilt_rows in zip(kept, rebuilt):
+        assert kept_rows.keys() == rebuilt_rows.keys()
+        assert kept_rows == pytest.approx(rebuilt_rows)
+
+    # With the archive, every entry's history reads back exactly as it was before compaction
+    for entry_id in entry_ids:
+        assert entry_history(entry_id) == histories[entry_id]
@@ -0,0 +1,52 @@
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from db_utils import use_database, create_table, insert_entry, insert_goal
+
+# AppTest runs the page in this process, so it reads the database set up below
+PAGE = '''
+from views.dashboard import dashboard
+dashboard()
+'''
+
+@pytest.fixture
+def ledger(tmp_path):
+    use_database(str(tmp_path / "networth.db"))
+    create_table()
+    insert_entry("2024-01-31", "assets", "Stocks", "Index fund", 1200.0)
+    insert_goal("Asset", "Stocks", 5000.0, 3800.0)
+
+def projected_goals(page):
+    return page.selectbox(key="timeline_goal").options
+
+@pytest.fixture
+def rerun_scopes(monkeypatch):
+    # AppTest reruns the whole page even when a fragment asks for a rerun of its own, so record
+    # the scope each rerun asks for
+    scopes = []
+    rerun = st.rerun
+
+    def recording_rerun(*, scope="app"):
+        scopes.append(scope)
+        rerun(scope=scope)
+
+    monkeypatch.setattr(st, "rerun", recording_rerun)
+    return scopes
+
+def test_timeline_goal_picker_follows_added_and_deleted_goals(ledger, rerun_scopes):
+    page = AppTest.from_string(PAGE, default_timeout=60)
+    page.run()
+    assert not page.exception
+    assert len(projected_goals(page)) == 2
+
+    page.number_input(key="goal_amount").set_value(20000.0)
+    page.button(key="set_goal").click().run()
+    assert not page.exception
+    assert len(projected_goals(page)) == 3
+
+    page.button(key="delete_goal_1").click().run()
+    assert not page.exception
+    assert len(projected_goals(page)) == 2
+    # The timeline is a fragment of its own, so the goals section reruns the whole page
+    assert rerun_scopes == ["app", "app"]
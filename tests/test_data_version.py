@@ -0,0 +1,33 @@
+import sqlite3
+
+from db_utils import use_database, create_table, insert_entry, data_version, get_db_connection
+from cache import versioned_cache
+
+@versioned_cache
+def count_entries():
+    return get_db_connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+def test_writes_from_other_connections_refresh_cached_reads(tmp_path):
+    path = str(tmp_path / "networth.db")
+    use_database(path)
+    create_table()
+    insert_entry("2024-01-31", "assets", "Stocks", "Index fund", 1200.0)
+    assert count_entries() == 1
+    version = data_version()
+    assert data_version() == version
+
+    # Another process, such as the importer run from the command line, writes on its own connection
+    other = sqlite3.connect(path)
+    with other:
+        other.execute("INSERT INTO assets_liabilities (date, category, subcategory, description, value) VALUES ('2024-02-29', 'assets', 'Gold', 'Coins', 300)")
+    other.close()
+
+    assert data_version() != version
+    assert count_entries() == 2
+
+def test_own_writes_refresh_cached_reads(tmp_path):
+    use_database(str(tmp_path / "networth.db"))
+    create_table()
+    assert count_entries() == 0
+    insert_entry("2024-01-31", "assets", "Stocks", "Index fund", 1200.0)
+    assert count_entries() == 1
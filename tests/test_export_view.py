@@ -0,0 +1,42 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from db_utils import use_database, create_table, insert_entry, insert_goal
+from exporter import EXPORT_FORMATS
+
+# AppTest runs the page in this process, so it reads the database set up below
+PAGE = '''
+from views.export import export_data
+export_data()
+'''
+
+@pytest.fixture
+def ledger(tmp_path):
+    use_database(str(tmp_path / "networth.db"))
+    create_table()
+    insert_entry("2024-01-31", "assets", "Stocks", "Index fund", 1200.0)
+    insert_entry("2024-02-29", "liabilities", "Mortgage", "House", 800.0)
+    insert_goal("Net Worth", "Net Worth", 5000.0, 4600.0)
+
+def prepare_export(file_format, history=False, goals=False):
+    page = AppTest.from_string(PAGE, default_timeout=60)
+    page.run()
+    page.radio[0].set_value(file_format)
+    page.checkbox[0].set_value(history)
+    page.checkbox[1].set_value(goals)
+    page.button[0].click().run()
+    return page
+
+@pytest.mark.parametrize("file_format", list(EXPORT_FORMATS))
+def test_prepare_export_offers_download(ledger, file_format):
+    page = prepare_export(file_format)
+    assert not page.exception
+    assert not page.error
+    [download] = page.get("download_button")
+    assert download.proto.label.startswith(f"Download net_worth_data.{EXPORT_FORMATS[file_format].extension} (2 rows)")
+
+def test_prepare_export_of_several_tables(ledger):
+    page = prepare_export("csv", history=True, goals=True)
+    assert not page.exception
+    [download] = page.get("download_button")
+    assert download.proto.label.startswith("Download net_worth_data.zip")
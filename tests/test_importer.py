@@ -0,0 +1,45 @@
+import csv
+import io
+
+import pytest
+
+from db_utils import use_database, create_table, get_db_connection
+from importer import import_file, ParseError
+
+HEADER = "date,category,subcategory,description,value\n"
+
+@pytest.fixture
+def database(tmp_path):
+    use_database(str(tmp_path / "networth.db"))
+    create_table()
+
+def upload(text, name):
+    source = io.BytesIO(text.encode())
+    source.name = name
+    return source
+
+def test_import_csv(database):
+    result = import_file(upload(HEADER + "2024-01-31,assets,Stocks,Index fund,1200\n2024-01-31,assets,Nope,x,1\n", "ledger.csv"))
+    assert (result.imported, result.rejected) == (1, 1)
+    assert get_db_connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0] == 1
+
+def test_import_accepts_zero_and_rejects_negative_values(database):
+    result = import_file(upload(HEADER + "2024-01-31,liabilities,Mortgage,Paid off,0\n2024-01-31,assets,Stocks,Index fund,-5\n2024-01-31,assets,Stocks,Index fund,inf\n", "ledger.csv"))
+    assert (result.imported, result.rejected) == (1, 2)
+    assert result.errors == [(2, "value must not be negative, got -5.0"), (3, "value must be a finite number, got inf")]
+
+def test_unparseable_csv_raises_parse_error_with_line(database):
+    limit = csv.field_size_limit(100)
+    try:
+        with pytest.raises(ParseError) as error:
+            import_file(upload(HEADER + "2024-01-31,assets,Stocks,Index fund,1200\n2024-01-31,assets,Stocks," + "x" * 200 + ",1\n", "ledger.csv"))
+    finally:
+        csv.field_size_limit(limit)
+    assert error.value.line == 3
+
+def test_invalid_json_line_raises_parse_error_with_line(database):
+    line = '{"date": "2024-01-31", "category": "assets", "subcategory": "Stocks", "description": "Fund", "value": 10}\n'
+    with pytest.raises(ParseError) as error:
+        import_file(upload(line * 3 + '{"date": oops}\n' + line, "ledger.jsonl"))
+    assert error.value.line == 4
+    assert isinstance(error.value, ValueError)
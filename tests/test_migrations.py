@@ -0,0 +1,32 @@
+from db_utils import use_database, create_table, get_db_connection, transaction, MIGRATIONS, _normalise_entries
+
+def legacy_dates():
+    return get_db_connection().execute("SELECT entry_id, date FROM legacy_dates ORDER BY entry_id").fetchall()
+
+def test_normalising_keeps_unreadable_legacy_dates(tmp_path):
+    # A database from before the entries were normalised, whose TEXT date column took anything
+    use_database(str(tmp_path / "networth.db"))
+    before = MIGRATIONS.index(_normalise_entries)
+    with transaction() as cursor:
+        for migration in MIGRATIONS[:before]:
+            migration(cursor)
+        cursor.execute(f"PRAGMA user_version = {before}")
+        cursor.executemany(
+            "INSERT INTO assets_liabilities (date, category, subcategory, description, value) VALUES (?, ?, ?, ?, ?)",
+            [("2024-01-31", "assets", "Stocks", "Index fund", 1200.0), ("31/01/2024", "assets", "Gold", "Coins", 300.0)]
+        )
+    create_table()
+
+    conn = get_db_connection()
+    assert conn.execute("SELECT id, date FROM assets_liabilities ORDER BY id").fetchall() == [(1, "2024-01-31"), (2, None)]
+    assert legacy_dates() == [(2, "31/01/2024")]
+
+    # Writes through the view keep unreadable dates as well, and fixing or deleting an entry clears them
+    with transaction() as cursor:
+        cursor.execute("INSERT INTO assets_liabilities (date, category, subcategory, description, value) VALUES ('end of March', 'assets', 'Cash', 'Wallet', 50)")
+        cursor.execute("UPDATE assets_liabilities SET value = 350 WHERE id = 2")
+    assert legacy_dates() == [(2, "31/01/2024"), (3, "end of March")]
+    with transaction() as cursor:
+        cursor.execute("UPDATE assets_liabilities SET date = '2024-01-31' WHERE id = 2")
+        cursor.execute("DELETE FROM assets_liabilities WHERE id = 3")
+    assert legacy_dates() == []
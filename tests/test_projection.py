@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+from db_utils import use_database, create_table, insert_entry, update_entry, insert_goal, get_db_connection
+from engine import goals_for_summary
+from projection import project_goals, PERCENTILES
+import ledger
+
+MONTH_ENDS = ["2024-01-31", "2024-02-29", "2024-03-31", "2024-04-30", "2024-05-31", "2024-06-30"]
+TODAY = date(2024, 7, 15)
+
+@pytest.fixture
+def projections(tmp_path):
+    # Stocks grow by 100 and the mortgage shrinks by 1,000 every month, exactly, so every
+    # simulated path follows the same straight line and reaches its goal in the same month
+    use_database(str(tmp_path / "networth.db"))
+    create_table()
+    insert_entry(MONTH_ENDS[0], "assets", "Stocks", "Index fund", 1000.0)
+    insert_entry(MONTH_ENDS[0], "liabilities", "Mortgage", "House", 111000.0)
+    for month, month_end in enumerate(MONTH_ENDS[1:], start=1):
+        update_entry(1, 1000.0 + 100 * month, "Index fund", month_end)
+        update_entry(2, 111000.0 - 1000 * month, "House", month_end)
+    insert_goal("Asset", "Stocks", 1950.0, 0)
+    insert_goal("Liability", "Mortgage", 50000.0, 0)
+    insert_goal("Net Worth", "Net Worth", 0.0, 0)
+
+    conn = get_db_connection()
+    goals = goals_for_summary(conn, ledger.load(conn).summary())
+    return {projection.goal_id: projection for projection in project_goals(conn, goals, TODAY)}
+
+def reach_dates(projection):
+    return {projection.reach_dates[percentile] for percentile in PERCENTILES}
+
+def test_asset_goal(projections):
+    # 1,500 now: 1,900 after four months, 2,000 after five
+    projection = projections[1]
+    assert projection.target == 1950.0
+    assert reach_dates(projection) == {date(2024, 12, 1)}
+    assert projection.probability == 1.0
+
+def test_liability_goal(projections):
+    # 106,000 outstanding, down to the goal's 50,000 after 56 months
+    projection = projections[2]
+    assert projection.target == 50000.0
+    assert reach_dates(projection) == {date(2029, 3, 1)}
+    # Paid off after 106 months, and never below 0 after that
+    assert projection.bands[50][106] == 0.0
+    assert min(band.min() for band in projection.bands.values()) == 0.0
+
+def test_net_worth_goal(projections):
+    # -104,500 now, up by 1,100 a month: 0 after 95 months
+    projection = projections[3]
+    assert projection.target == 0.0
+    assert reach_dates(projection) == {date(2032, 6, 1)}
@@ -0,0 +1,30 @@
+from db_utils import use_database, create_table, insert_entry, update_entry, get_db_connection
+from archive import compact_history
+from engine import EntrySearch, count_entries, entries_page
+
+def matches(text):
+    search = EntrySearch(text, include_history=True)
+    conn = get_db_connection()
+    ids = sorted(row[0] for row in entries_page(conn, "assets", search=search))
+    assert count_entries(conn, "assets", search=search) == len(ids)
+    return ids
+
+def test_search_after_compaction(tmp_path):
+    use_database(str(tmp_path / "networth.db"))
+    create_table()
+    insert_entry("2020-01-10", "assets", "Stocks", "Index fund", 1000.0)
+    insert_entry("2023-05-01", "assets", "Savings", "Rainy day", 500.0)
+    update_entry(1, 1100.0, "World tracker", "2020-02-15")
+    update_entry(2, 600.0, "Emergency fund", "2024-03-01")
+    assert matches("index") == [1]
+    assert matches("rainy") == [2]
+
+    compact_history("2021-01-01")
+    # Checkpoints are not earlier descriptions
+    assert matches("monthly") == []
+    assert matches("checkpoint") == []
+    # Current descriptions, and earlier ones after the horizon, are still found; earlier ones
+    # from compacted months are only kept in the archive
+    assert matches("world") == [1]
+    assert matches("rainy") == [2]
+    assert matches("index") == []
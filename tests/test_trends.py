@@ -0,0 +1,41 @@
+import sqlite3
+
+from db_utils import use_database, create_table, insert_entry, get_db_connection
+from trends import load_deltas
+
+class WriteAfterFirstRead:
+    # Stands in for a connection and commits a change from another connection right after the
+    # first query, as another process saving while the deltas are read would
+    def __init__(self, conn, path):
+        self.conn = conn
+        self.path = path
+        self.written = False
+
+    @property
+    def in_transaction(self):
+        return self.conn.in_transaction
+
+    def execute(self, sql, parameters=()):
+        cursor = self.conn.execute(sql, parameters)
+        if not self.written and sql.lstrip().startswith("SELECT"):
+            self.written = True
+            other = sqlite3.connect(self.path)
+            with other:
+                other.execute("INSERT INTO subcategory_daily_totals (category, subcategory, date, delta) VALUES ('assets', 'Gold', '2024-02-29', 300)")
+            other.close()
+        return cursor
+
+    def commit(self):
+        self.conn.commit()
+
+def test_deltas_are_read_from_one_snapshot(tmp_path):
+    path = str(tmp_path / "networth.db")
+    use_database(path)
+    create_table()
+    insert_entry("2024-01-31", "assets", "Stocks", "Index fund", 1200.0)
+
+    deltas = load_deltas(WriteAfterFirstRead(get_db_connection(), path))
+    assert deltas.keys == [("assets", "Stocks")]
+    assert len(deltas.series) == len(deltas.days) == 1
+    # The change written meanwhile shows up on the next read
+    assert load_deltas(get_db_connection()).keys == [("assets", "Gold"), ("assets", "Stocks")]
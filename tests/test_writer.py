@@ -0,0 +1,94 @@
+import sqlite3
+import threading
+
+import pytest
+
+from db_utils import use_database, create_table, insert_entry, get_db_connection
+from writer import WriteQueue
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "networth.db")
+    use_database(path)
+    create_table()
+    return path
+
+def committed_descriptions(path):
+    # What another connection, such as another process, sees
+    other = sqlite3.connect(path)
+    try:
+        return [description for description, in other.execute("SELECT description FROM entries ORDER BY id")]
+    finally:
+        other.close()
+
+def hold(writer):
+    # Keeps the writer thread busy until the returned event is set, so the jobs submitted
+    # meanwhile queue up and are taken together
+    started, release = threading.Event(), threading.Event()
+    writer.submit(lambda: (started.set(), release.wait(10)))
+    assert started.wait(10)
+    return release
+
+def save(description):
+    insert_entry("2024-01-31", "assets", "Stocks", description, 100.0)
+    return description
+
+def test_failing_job_is_rolled_back_alone(path):
+    writer = WriteQueue()
+    release = hold(writer)
+
+    def fail():
+        save("Failed")
+        raise ValueError("rejected")
+
+    futures = [writer.submit(save, "First"), writer.submit(fail), writer.submit(save, "Last")]
+    release.set()
+    assert futures[0].result(10) == "First"
+    with pytest.raises(ValueError, match="rejected"):
+        futures[1].result(10)
+    assert futures[2].result(10) == "Last"
+    # The three jobs shared one transaction, after the one holding the writer
+    assert writer.batches == 2
+    assert committed_descriptions(path) == ["First", "Last"]
+
+def test_future_resolves_after_commit(path):
+    writer = WriteQueue()
+    release = hold(writer)
+    seen = {}
+    done = threading.Event()
+
+    def job():
+        save("Saved")
+        # Inside the batch's transaction, nothing is visible to other connections yet
+        seen["during"] = committed_descriptions(path)
+
+    def resolved(_):
+        seen["resolved"] = committed_descriptions(path)
+        done.set()
+
+    writer.submit(job).add_done_callback(resolved)
+    release.set()
+    assert done.wait(10)
+    assert seen == {"during": [], "resolved": ["Saved"]}
+
+def test_alone_job_runs_between_batches(path):
+    writer = WriteQueue()
+    release = hold(writer)
+    order = []
+
+    def alone():
+        # Outside any transaction, after the saves queued before it have committed
+        order.append(("alone", get_db_connection().in_transaction, committed_descriptions(path)))
+
+    futures = [
+        writer.submit(lambda: order.append(save("Before"))),
+        writer.submit_alone(alone),
+        writer.submit(lambda: order.append(save("After"))),
+    ]
+    release.set()
+    for future in futures:
+        future.result(10)
+    assert order == ["Before", ("alone", False, ["Before"]), "After"]
+    # The held job, the save before, the job alone and the save after
+    assert writer.batches == 4
+    assert committed_descriptions(path) == ["Before", "After"]